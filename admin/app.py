@@ -9,6 +9,9 @@ from flask import Flask, jsonify, render_template, session
 from flask_cors import CORS
 from sqlalchemy import create_engine, text
 
+from backend.pubsub import Listener
+from backend.settings import SettingsRegistry
+
 # --- Config ---
 DATABASE_URL = os.environ.get(
     "DATABASE_URL",
@@ -17,6 +20,8 @@ DATABASE_URL = os.environ.get(
 SECRET_KEY = os.environ.get("SECRET_KEY", "change-me-in-production")
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+listener = Listener(engine)
+settings_registry = SettingsRegistry(engine, listener)
 
 # --- App ---
 app = Flask(__name__)
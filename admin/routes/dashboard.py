@@ -1,13 +1,27 @@
 """
 Admin Dashboard route — F3.1.
 Single-screen overview: widgets, kanban board, charts, alerts.
+
+All dashboard data comes from one CTE round trip (SNAPSHOT_SQL) that
+returns a JSON snapshot. Snapshots are shared, so the cost stays the same
+however many admins keep the page open:
+
+- each worker caches the snapshot for SNAPSHOT_TTL seconds,
+- the last snapshot is stored in the unlogged dashboard_snapshot table,
+  so other gunicorn workers reuse it instead of rebuilding,
+- an order_events NOTIFY (any order change) makes every worker rebuild
+  on its next request instead of trusting either copy.
 """
 
 import logging
-from datetime import datetime, timezone, timedelta
-from flask import Blueprint, render_template, session
+import threading
+import time
+from datetime import date, datetime, timezone
+from flask import Blueprint, render_template
 from sqlalchemy import text
 from admin.auth import login_required
+from backend.pubsub import ORDER_EVENTS_CHANNEL
+from backend.rollup import business_day
 
 log = logging.getLogger("gg-hookah-admin.dashboard")
 
@@ -51,15 +65,6 @@ QUICK_ACTIONS = {
 }
 
 
-def _get_setting(conn, key, default=None):
-    """Read a single setting from the settings table."""
-    row = conn.execute(
-        text("SELECT value FROM settings WHERE key = :k"),
-        {"k": key},
-    ).fetchone()
-    return row[0] if row else default
-
-
 def _time_ago(dt):
     """Return human-readable time ago string."""
     if not dt:
@@ -79,145 +84,166 @@ def _time_ago(dt):
     return f'{hours // 24}d ago'
 
 
+SNAPSHOT_TTL = 5  # seconds
+
+# Every widget, the kanban, charts and alert sources in one statement
+# (today / 7-day revenue and top mixes from the maintained counters);
+# the result is stored for other workers in the same round trip.
+SNAPSHOT_SQL = """
+    WITH active AS (
+        SELECT o.id, o.status, o.phone, o.hookah_count,
+               o.address_text, o.created_at, o.session_ends_at,
+               o.comment, o.deposit_type,
+               g.trust_flag, g.name AS guest_name
+        FROM orders o
+        LEFT JOIN guests g ON o.guest_id = g.id
+        WHERE o.status NOT IN ('COMPLETED', 'CANCELED')
+    ), active_mixes AS (
+        SELECT oi.order_id,
+               json_agg(m.name || CASE WHEN oi.quantity > 1 THEN ' x' || oi.quantity ELSE '' END
+                        ORDER BY oi.created_at) AS mixes
+        FROM order_items oi
+        JOIN mixes m ON oi.mix_id = m.id
+        WHERE oi.item_type = 'hookah'
+          AND oi.order_id IN (SELECT id FROM active)
+        GROUP BY oi.order_id
+    ), today AS (
+        SELECT orders_count AS cnt, revenue_gel AS revenue
+        FROM daily_order_stats
+        WHERE day = {today}
+    ), revenue AS (
+        SELECT d::date AS day, COALESCE(s.revenue_gel, 0) AS revenue
+        FROM generate_series({today} - 6, {today}, interval '1 day') d
+        LEFT JOIN daily_order_stats s ON s.day = d::date
+    ), top_mixes AS (
+        SELECT m.name, s.item_count AS cnt
+        FROM mix_stats s
+        JOIN mixes m ON s.mix_id = m.id
+        ORDER BY s.item_count DESC
+        LIMIT 5
+    ), snapshot AS (
+        SELECT json_build_object(
+            'orders_today', COALESCE((SELECT cnt FROM today), 0),
+            'today_revenue', COALESCE((SELECT revenue FROM today), 0),
+            'live_orders', (SELECT COUNT(*) FROM active),
+            'active_sessions', (SELECT COUNT(*) FROM active
+                                WHERE status IN ('SESSION_ACTIVE', 'SESSION_ENDING')),
+            'rented_hookahs', (SELECT COALESCE(SUM(hookah_count), 0) FROM active
+                               WHERE status IN (
+                                   'CONFIRMED', 'ON_THE_WAY', 'DELIVERED',
+                                   'SESSION_ACTIVE', 'SESSION_ENDING', 'WAITING_FOR_PICKUP'
+                               )),
+            'active', COALESCE((
+                SELECT json_agg(json_build_object(
+                    'id', a.id, 'status', a.status, 'phone', a.phone,
+                    'hookah_count', a.hookah_count, 'address_text', a.address_text,
+                    'created_at', a.created_at, 'session_ends_at', a.session_ends_at,
+                    'comment', a.comment, 'deposit_type', a.deposit_type,
+                    'trust_flag', a.trust_flag, 'guest_name', a.guest_name,
+                    'mixes', am.mixes
+                ) ORDER BY a.created_at)
+                FROM active a
+                LEFT JOIN active_mixes am ON am.order_id = a.id
+            ), '[]'),
+            'revenue', (SELECT json_agg(json_build_object('day', day, 'revenue', revenue)
+                                        ORDER BY day) FROM revenue),
+            'top_mixes', COALESCE((SELECT json_agg(json_build_object('name', name, 'cnt', cnt)
+                                                   ORDER BY cnt DESC) FROM top_mixes), '[]')
+        )::jsonb AS data
+    )
+    INSERT INTO dashboard_snapshot (id, data, built_at)
+    SELECT 1, data, now() FROM snapshot
+    ON CONFLICT (id) DO UPDATE SET data = EXCLUDED.data, built_at = EXCLUDED.built_at
+    RETURNING data
+""".format(today=business_day("now()"))
+
+SHARED_SNAPSHOT_SQL = """
+    SELECT data FROM dashboard_snapshot
+    WHERE id = 1 AND built_at > now() - make_interval(secs => :ttl)
+"""
+
+
+class DashboardSnapshots:
+    """Per-worker snapshot cache backed by the shared dashboard_snapshot row."""
+
+    def __init__(self, engine, listener):
+        self.engine = engine
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._data = None
+        self._lock = threading.Lock()
+        listener.subscribe(ORDER_EVENTS_CHANNEL, self.invalidate)
+
+    def invalidate(self, payload=None):
+        self.version += 1
+
+    def get(self):
+        with self._lock:
+            if (self._loaded_version == self.version
+                    and time.monotonic() - self._loaded_at < SNAPSHOT_TTL):
+                return self._data
+
+            version = self.version
+            with self.engine.begin() as conn:
+                data = None
+                # After an order event only a fresh build is trustworthy
+                if self._loaded_version == version or self._data is None:
+                    data = conn.execute(text(SHARED_SNAPSHOT_SQL), {"ttl": SNAPSHOT_TTL}).scalar()
+                if data is None:
+                    data = conn.execute(text(SNAPSHOT_SQL)).scalar()
+            self._data = data
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+            return data
+
+
+_snapshots = None
+
+
+def _get_snapshot():
+    global _snapshots
+    if _snapshots is None:
+        from admin.app import engine, listener
+        _snapshots = DashboardSnapshots(engine, listener)
+    return _snapshots.get()
+
+
+def _parse_ts(value):
+    return datetime.fromisoformat(value) if value else None
+
+
 @dashboard_bp.route('/')
 @login_required
 def index():
     """Main dashboard — single-screen overview."""
-    from admin.app import engine
-
-    with engine.connect() as conn:
-        # --- 1. Widget: Today's orders count + revenue ---
-        today_stats = conn.execute(text("""
-            SELECT
-                COUNT(DISTINCT o.id) as cnt,
-                COALESCE(SUM(oi.total_price_gel), 0) as revenue
-            FROM orders o
-            LEFT JOIN order_items oi ON oi.order_id = o.id
-            WHERE o.created_at::date = CURRENT_DATE
-              AND o.status != 'CANCELED'
-        """)).mappings().first()
-
-        # --- 2. Widget: Live (active) orders ---
-        live_count = conn.execute(text("""
-            SELECT COUNT(*) as cnt FROM orders
-            WHERE status NOT IN ('COMPLETED', 'CANCELED')
-        """)).scalar()
-
-        # --- 3. Widget: Active sessions ---
-        sessions_count = conn.execute(text("""
-            SELECT COUNT(*) as cnt FROM orders
-            WHERE status IN ('SESSION_ACTIVE', 'SESSION_ENDING')
-        """)).scalar()
-
-        # --- 4. Widget: Available hookahs ---
-        total_hookahs = int(_get_setting(conn, 'total_hookahs', '5'))
-        rented_hookahs = conn.execute(text("""
-            SELECT COALESCE(SUM(hookah_count), 0) FROM orders
-            WHERE status IN (
-                'CONFIRMED', 'ON_THE_WAY', 'DELIVERED',
-                'SESSION_ACTIVE', 'SESSION_ENDING', 'WAITING_FOR_PICKUP'
-            )
-        """)).scalar()
-        available_hookahs = max(0, total_hookahs - int(rented_hookahs))
-
-        # --- 5. Kanban: Active orders ---
-        kanban_rows = conn.execute(text("""
-            SELECT
-                o.id, o.status, o.phone, o.hookah_count,
-                o.address_text, o.created_at, o.session_ends_at,
-                o.comment, o.deposit_type,
-                g.trust_flag, g.name as guest_name
-            FROM orders o
-            LEFT JOIN guests g ON o.guest_id = g.id
-            WHERE o.status NOT IN ('COMPLETED', 'CANCELED')
-            ORDER BY o.created_at ASC
-        """)).mappings().all()
-
-        # Get order items (mixes) for each active order
-        order_mixes = {}
-        if kanban_rows:
-            mix_rows = conn.execute(text("""
-                SELECT oi.order_id, m.name as mix_name, oi.quantity
-                FROM order_items oi
-                JOIN mixes m ON oi.mix_id = m.id
-                WHERE oi.item_type = 'hookah'
-                  AND oi.order_id IN (
-                      SELECT id FROM orders
-                      WHERE status NOT IN ('COMPLETED', 'CANCELED')
-                  )
-                ORDER BY oi.created_at
-            """)).mappings().all()
-            for mr in mix_rows:
-                oid = str(mr['order_id'])
-                if oid not in order_mixes:
-                    order_mixes[oid] = []
-                qty_str = f' x{mr["quantity"]}' if mr['quantity'] > 1 else ''
-                order_mixes[oid].append(f'{mr["mix_name"]}{qty_str}')
-
-        # --- 6. Chart: Revenue per day (last 7 days) ---
-        revenue_rows = conn.execute(text("""
-            SELECT d::date as day,
-                   COALESCE(SUM(oi.total_price_gel), 0) as revenue
-            FROM generate_series(
-                CURRENT_DATE - INTERVAL '6 days',
-                CURRENT_DATE,
-                '1 day'
-            ) d
-            LEFT JOIN orders o ON o.created_at::date = d::date
-                AND o.status != 'CANCELED'
-            LEFT JOIN order_items oi ON oi.order_id = o.id
-            GROUP BY d::date
-            ORDER BY d::date
-        """)).mappings().all()
-
-        # --- 7. Chart: Top mixes (all time, top 5) ---
-        top_mixes = conn.execute(text("""
-            SELECT m.name, COUNT(*) as cnt
-            FROM order_items oi
-            JOIN mixes m ON oi.mix_id = m.id
-            WHERE oi.item_type = 'hookah'
-            GROUP BY m.name
-            ORDER BY cnt DESC
-            LIMIT 5
-        """)).mappings().all()
-
-        # --- 8. Alerts: Overdue sessions ---
-        overdue = conn.execute(text("""
-            SELECT o.id, o.phone, o.session_ends_at, o.address_text,
-                   g.name as guest_name
-            FROM orders o
-            LEFT JOIN guests g ON o.guest_id = g.id
-            WHERE o.status IN ('SESSION_ACTIVE', 'SESSION_ENDING')
-              AND o.session_ends_at < now()
-        """)).mappings().all()
-
-        # --- 9. Alerts: Low trust guests with active orders ---
-        low_trust = conn.execute(text("""
-            SELECT o.id, o.phone, g.trust_flag, g.name as guest_name
-            FROM orders o
-            JOIN guests g ON o.guest_id = g.id
-            WHERE o.status NOT IN ('COMPLETED', 'CANCELED')
-              AND g.trust_flag = 'low'
-        """)).mappings().all()
+    from admin.app import settings_registry
+
+    cfg = settings_registry.snapshot()
+    snap = _get_snapshot()
+
+    # Available hookahs
+    total_hookahs = cfg.get('total_hookahs', 5)
+    available_hookahs = max(0, total_hookahs - int(snap['rented_hookahs']))
 
     # Build kanban columns
     now = datetime.now(timezone.utc)
     kanban = {s: [] for s in KANBAN_STATUSES}
-    for row in kanban_rows:
+    overdue, low_trust = [], []
+    for row in snap['active']:
         order = dict(row)
+        order['created_at'] = _parse_ts(order['created_at'])
+        order['session_ends_at'] = _parse_ts(order['session_ends_at'])
         status = order['status']
         # SESSION_ENDING orders go into SESSION_ACTIVE column
         col = status if status in KANBAN_STATUSES else 'SESSION_ACTIVE'
-        order['id_short'] = str(order['id'])[:8]
+        order['id_short'] = order['id'][:8]
         order['time_ago'] = _time_ago(order['created_at'])
-        order['mixes_display'] = order_mixes.get(str(order['id']), ['—'])
+        order['mixes_display'] = order.pop('mixes') or ['—']
 
         # Remaining time for sessions
         if order.get('session_ends_at') and status in ('SESSION_ACTIVE', 'SESSION_ENDING'):
-            ends = order['session_ends_at']
-            if ends.tzinfo is None:
-                ends = ends.replace(tzinfo=timezone.utc)
-            remaining = ends - now
+            remaining = order['session_ends_at'] - now
             order['remaining_min'] = max(0, int(remaining.total_seconds() // 60))
             order['is_overdue'] = remaining.total_seconds() < 0
         else:
@@ -228,13 +254,20 @@ def index():
         order['status_color'] = STATUS_COLORS.get(status, '#7f8c8d')
         kanban[col].append(order)
 
+        if order['is_overdue']:
+            overdue.append(order)
+        if order['trust_flag'] == 'low':
+            low_trust.append(order)
+
     # Chart data
     day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    revenue_rows = snap['revenue'] or []
     chart_revenue = {
-        'labels': [day_names[r['day'].weekday()] for r in revenue_rows],
+        'labels': [day_names[date.fromisoformat(r['day']).weekday()] for r in revenue_rows],
         'data': [int(r['revenue']) for r in revenue_rows],
     }
 
+    top_mixes = snap['top_mixes']
     mix_colors = ['#F28C18', '#2ecc71', '#3498db', '#9b59b6', '#e74c3c']
     chart_mixes = {
         'labels': [r['name'] for r in top_mixes],
@@ -245,30 +278,27 @@ def index():
     # Alerts
     alerts = {
         'overdue': [{
-            'id': str(r['id'])[:8],
-            'full_id': str(r['id']),
-            'phone': r['phone'],
-            'guest_name': r['guest_name'] or '—',
-            'address': (r['address_text'] or '')[:40],
-            'overdue_min': max(0, int((now - (
-                r['session_ends_at'].replace(tzinfo=timezone.utc)
-                if r['session_ends_at'] and r['session_ends_at'].tzinfo is None
-                else r['session_ends_at']
-            )).total_seconds() // 60)) if r['session_ends_at'] else 0,
-        } for r in overdue],
+            'id': o['id_short'],
+            'full_id': o['id'],
+            'phone': o['phone'],
+            'guest_name': o['guest_name'] or '—',
+            'address': (o['address_text'] or '')[:40],
+            'overdue_min': int((now - o['session_ends_at']).total_seconds() // 60),
+        } for o in overdue],
         'low_trust': [{
-            'id': str(r['id'])[:8],
-            'full_id': str(r['id']),
-            'phone': r['phone'],
-            'guest_name': r['guest_name'] or '—',
-        } for r in low_trust],
+            'id': o['id_short'],
+            'full_id': o['id'],
+            'phone': o['phone'],
+            'guest_name': o['guest_name'] or '—',
+        } for o in low_trust],
     }
 
+    live_count = snap['live_orders']
     widgets = {
-        'live_orders': live_count or 0,
-        'today_revenue': int(today_stats['revenue']) if today_stats else 0,
-        'orders_today': int(today_stats['cnt']) if today_stats else 0,
-        'active_sessions': sessions_count or 0,
+        'live_orders': live_count,
+        'today_revenue': int(snap['today_revenue']),
+        'orders_today': int(snap['orders_today']),
+        'active_sessions': snap['active_sessions'],
         'hookahs_available': available_hookahs,
         'hookahs_total': total_hookahs,
     }
@@ -282,4 +312,4 @@ def index():
                            chart_revenue=chart_revenue,
                            chart_mixes=chart_mixes,
                            alerts=alerts,
-                           total_active=live_count or 0)
+                           total_active=live_count)
@@ -3,11 +3,15 @@ Admin Guests Management (CRM) — F3.3.
 List, detail, edit for guest profiles with order history.
 """
 
+import base64
 import json
 import logging
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash
+import re
+import uuid
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
 from sqlalchemy import text
 from admin.auth import login_required
+from backend.phones import normalize_phone, phone_digits
 
 log = logging.getLogger("gg-hookah-admin.guests")
 
@@ -27,6 +31,36 @@ TRUST_ICONS = {
     'blacklist': '🔴',
 }
 
+GUESTS_PAGE_SIZE = 50
+
+GUEST_LIST_COLUMNS = """
+    g.id, g.phone, g.telegram_id, g.name,
+    g.trust_flag, g.passport_photo_url, g.notes,
+    g.total_orders, g.total_rebowls, g.cancel_count,
+    g.created_at, g.total_spent, g.last_order_at
+"""
+
+# Sort key -> (SQL expression, type for the cursor CAST); each has a
+# (expression DESC, id DESC) index. NULL last_order_at sorts last.
+GUEST_SORTS = {
+    'created': ("g.created_at", "timestamptz"),
+    'spent': ("g.total_spent", "bigint"),
+    'last_order': ("COALESCE(g.last_order_at, '-infinity'::timestamptz)", "timestamptz"),
+}
+
+GUEST_SORT_LABELS = {
+    'created': 'Newest',
+    'spent': 'Top spenders',
+    'last_order': 'Recent orders',
+}
+
+SEARCH_RESULTS = 50
+TYPEAHEAD_RESULTS = 10
+TYPEAHEAD_MIN_LENGTH = 3
+
+# Digits and phone separators only: searched as a phone, anything else by name
+_PHONE_QUERY = re.compile(r"[\d\s()+\-.]+")
+
 STATUS_COLORS = {
     'NEW': '#3498db',
     'CONFIRMED': '#2ecc71',
@@ -53,47 +87,131 @@ def _audit_log(conn, entity_id, action, details, admin_id):
     })
 
 
+def _encode_cursor(sort_key, guest_id):
+    raw = f"{sort_key}|{guest_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    """(sort key as text, guest_id) from an opaque cursor; ValueError if malformed."""
+    try:
+        sort_key, guest_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return sort_key, str(uuid.UUID(guest_id))
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_terms(q):
+    """(WHERE clause, ORDER BY terms, params) for a search.
+
+    Phone-like queries match the canonical phone exactly, by its last
+    digits (reverse(phone) prefix, ix_guests_phone_reversed) or anywhere
+    (trigram), ranked in that order; other queries match names by trigram,
+    ranked by similarity. Each match kind is indexed, so the OR becomes a
+    bitmap OR of index scans.
+    """
+    params = {}
+    matches = []
+    if _PHONE_QUERY.fullmatch(q) and phone_digits(q):
+        digits = phone_digits(q)
+        exact = normalize_phone(q)
+        if exact:
+            matches.append("g.phone = :exact")
+            params['exact'] = exact
+        matches.append("reverse(g.phone) LIKE :rev")
+        params['rev'] = digits[::-1] + '%'
+        matches.append("g.phone LIKE :digits")
+        params['digits'] = f'%{digits}%'
+        order = []
+    else:
+        matches.append("g.name ILIKE :name")
+        params['name'] = f'%{_like_escape(q)}%'
+        params['q'] = q
+        order = ["similarity(g.name, :q) DESC"]
+    where = "(" + " OR ".join(matches) + ")"
+    if len(matches) > 1:
+        order.insert(0, "CASE " + " ".join(f"WHEN {m} THEN {i}" for i, m in enumerate(matches))
+                     + f" ELSE {len(matches)} END")
+    return where, order, params
+
+
+def _search_guests(conn, q, trust, limit):
+    """Best `limit` guests matching q, best match first."""
+    where, order, params = _search_terms(q)
+    conditions = [where]
+    if trust and trust != 'all':
+        conditions.append("g.trust_flag = :trust")
+        params['trust'] = trust
+    params['lim'] = limit
+    order += ["g.last_order_at DESC NULLS LAST", "g.id DESC"]
+    return conn.execute(text(f"""
+        SELECT {GUEST_LIST_COLUMNS}
+        FROM guests g
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {', '.join(order)}
+        LIMIT :lim
+    """), params).mappings().all()
+
+
 @guests_bp.route('/')
 @login_required
 def guests_list():
-    """List all guests with search and trust filter."""
+    """List guests with trust filter and sort (keyset-paginated), or search results."""
     from admin.app import engine
 
     q = request.args.get('q', '').strip()
     trust = request.args.get('trust', 'all')
+    sort = request.args.get('sort', 'created')
+    if sort not in GUEST_SORTS:
+        sort = 'created'
+    sort_expr, sort_type = GUEST_SORTS[sort]
 
-    # Build WHERE conditions
-    conditions = []
-    params = {}
+    cursor = request.args.get('after')
+    next_cursor = None
 
     if q:
-        conditions.append("(g.phone ILIKE :q OR g.name ILIKE :q)")
-        params['q'] = f'%{q}%'
-
-    if trust and trust != 'all':
-        conditions.append("g.trust_flag = :trust")
-        params['trust'] = trust
-
-    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        # Ranked matches, best first (no paging)
+        with engine.connect() as conn:
+            rows = _search_guests(conn, q, trust, SEARCH_RESULTS)
+    else:
+        conditions = []
+        params = {'lim': GUESTS_PAGE_SIZE + 1}
+
+        if trust and trust != 'all':
+            conditions.append("g.trust_flag = :trust")
+            params['trust'] = trust
+
+        if cursor:
+            try:
+                params['c_key'], params['c_id'] = _decode_cursor(cursor)
+            except ValueError:
+                return "Invalid cursor", 400
+            conditions.append(
+                f"({sort_expr}, g.id) < (CAST(:c_key AS {sort_type}), CAST(:c_id AS uuid))"
+            )
+
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+        # Walks the matching ix_guests_*_id index: cost depends on page size,
+        # not on the number of guests
+        query = text(f"""
+            SELECT {GUEST_LIST_COLUMNS}, ({sort_expr})::text AS sort_key
+            FROM guests g
+            {where}
+            ORDER BY {sort_expr} DESC, g.id DESC
+            LIMIT :lim
+        """)
 
-    query = text(f"""
-        SELECT
-            g.id, g.phone, g.telegram_id, g.name,
-            g.trust_flag, g.passport_photo_url, g.notes,
-            g.total_orders, g.total_rebowls,
-            g.created_at,
-            COALESCE(SUM(oi.total_price_gel), 0) as total_spent,
-            MAX(o.created_at) as last_order_at
-        FROM guests g
-        LEFT JOIN orders o ON o.guest_id = g.id AND o.status != 'CANCELED'
-        LEFT JOIN order_items oi ON oi.order_id = o.id
-        {where}
-        GROUP BY g.id
-        ORDER BY g.created_at DESC
-    """)
+        with engine.connect() as conn:
+            rows = conn.execute(query, params).mappings().all()
 
-    with engine.connect() as conn:
-        rows = conn.execute(query, params).mappings().all()
+        if len(rows) > GUESTS_PAGE_SIZE:
+            rows = rows[:GUESTS_PAGE_SIZE]
+            next_cursor = _encode_cursor(rows[-1]['sort_key'], rows[-1]['id'])
 
     guests = []
     for row in rows:
@@ -107,10 +225,41 @@ def guests_list():
                            guests=guests,
                            search_q=q,
                            trust_filter=trust,
+                           sort=sort,
+                           sort_labels=GUEST_SORT_LABELS,
+                           next_cursor=next_cursor,
+                           is_first_page=not cursor,
+                           search_results=SEARCH_RESULTS,
+                           typeahead_min_length=TYPEAHEAD_MIN_LENGTH,
                            trust_colors=TRUST_COLORS,
                            trust_icons=TRUST_ICONS)
 
 
+@guests_bp.route('/search')
+@login_required
+def guests_search():
+    """Typeahead: best matches for ?q= as JSON (phone digits, last digits or name)."""
+    from admin.app import engine
+
+    q = request.args.get('q', '').strip()
+    if len(q) < TYPEAHEAD_MIN_LENGTH:
+        return jsonify({'results': []})
+
+    with engine.connect() as conn:
+        rows = _search_guests(conn, q, request.args.get('trust', 'all'), TYPEAHEAD_RESULTS)
+
+    return jsonify({'results': [{
+        'id': str(r['id']),
+        'name': r['name'],
+        'phone': r['phone'],
+        'trust_flag': r['trust_flag'],
+        'trust_icon': TRUST_ICONS.get(r['trust_flag'], '⚪'),
+        'total_orders': r['total_orders'],
+        'last_order_at': r['last_order_at'].isoformat() if r['last_order_at'] else None,
+        'url': url_for('guests.guest_detail', guest_id=r['id']),
+    } for r in rows]})
+
+
 @guests_bp.route('/<guest_id>')
 @login_required
 def guest_detail(guest_id):
@@ -118,17 +267,12 @@ def guest_detail(guest_id):
     from admin.app import engine
 
     with engine.connect() as conn:
-        # Guest info with aggregated metrics
+        # Guest info with maintained stats (backend/guest_stats.py)
         row = conn.execute(text("""
-            SELECT
-                g.*,
-                COALESCE(SUM(oi.total_price_gel), 0) as total_spent,
-                MAX(o.created_at) as last_order_at
+            SELECT g.*, m.name AS favorite_mix
             FROM guests g
-            LEFT JOIN orders o ON o.guest_id = g.id AND o.status != 'CANCELED'
-            LEFT JOIN order_items oi ON oi.order_id = o.id
+            LEFT JOIN mixes m ON m.id = g.favorite_mix_id
             WHERE g.id = :gid
-            GROUP BY g.id
         """), {'gid': guest_id}).mappings().first()
 
         if not row:
@@ -136,19 +280,6 @@ def guest_detail(guest_id):
 
         guest = dict(row)
 
-        # Favorite mix
-        fav = conn.execute(text("""
-            SELECT m.name, COUNT(*) as cnt
-            FROM order_items oi
-            JOIN mixes m ON oi.mix_id = m.id
-            WHERE oi.item_type = 'hookah'
-              AND oi.order_id IN (SELECT id FROM orders WHERE guest_id = :gid)
-            GROUP BY m.name
-            ORDER BY cnt DESC
-            LIMIT 1
-        """), {'gid': guest_id}).mappings().first()
-        guest['favorite_mix'] = fav['name'] if fav else None
-
         # Order history
         orders = conn.execute(text("""
             SELECT
@@ -185,27 +316,44 @@ def guest_detail(guest_id):
 @guests_bp.route('/<guest_id>/update', methods=['POST'])
 @login_required
 def guest_update(guest_id):
-    """Update guest name, trust_flag, notes."""
+    """Update guest phone, name, trust_flag, notes."""
     from admin.app import engine
 
     admin_id = session.get('admin_id')
     name = request.form.get('name', '').strip()
     trust_flag = request.form.get('trust_flag', 'normal')
     notes = request.form.get('notes', '').strip()
+    raw_phone = request.form.get('phone', '').strip()
 
     if trust_flag not in TRUST_FLAGS:
         trust_flag = 'normal'
 
+    phone = normalize_phone(raw_phone) if raw_phone else None
+    if raw_phone and not phone:
+        flash(f'Invalid phone number: {raw_phone}', 'error')
+        return redirect(url_for('guests.guest_detail', guest_id=guest_id))
+
     with engine.connect() as conn:
         # Get current values
         current = conn.execute(text(
-            "SELECT name, trust_flag, notes FROM guests WHERE id = :gid"
+            "SELECT phone, name, trust_flag, notes FROM guests WHERE id = :gid"
         ), {'gid': guest_id}).mappings().first()
 
         if not current:
             return "Guest not found", 404
 
+        phone = phone or current['phone']
+        if phone != current['phone']:
+            taken = conn.execute(text(
+                "SELECT 1 FROM guests WHERE phone = :ph AND id != :gid"
+            ), {'ph': phone, 'gid': guest_id}).first()
+            if taken:
+                flash(f'Another guest already has phone {phone}.', 'error')
+                return redirect(url_for('guests.guest_detail', guest_id=guest_id))
+
         changes = {}
+        if phone != current['phone']:
+            changes['phone'] = {'from': current['phone'], 'to': phone}
         if (name or None) != (current['name'] or None):
             changes['name'] = {'from': current['name'], 'to': name or None}
         if trust_flag != current['trust_flag']:
@@ -216,12 +364,14 @@ def guest_update(guest_id):
         if changes:
             conn.execute(text("""
                 UPDATE guests
-                SET name = :name,
+                SET phone = :phone,
+                    name = :name,
                     trust_flag = :trust,
                     notes = :notes,
                     updated_at = now()
                 WHERE id = :gid
             """), {
+                'phone': phone,
                 'name': name or None,
                 'trust': trust_flag,
                 'notes': notes or None,
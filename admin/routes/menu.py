@@ -6,6 +6,7 @@ Spec 6.10: Mixes + Drinks CRUD.
 from flask import Blueprint, render_template, request, session, redirect, url_for, jsonify
 from sqlalchemy import text
 from admin.auth import login_required
+from backend.pubsub import CATALOG_CHANNEL, notify
 
 menu_bp = Blueprint('menu', __name__, url_prefix='/menu')
 
@@ -160,6 +161,7 @@ def _save_mix(engine, mix_id=None):
             _audit_log(conn, 'mix', str(new_id), 'MIX_CREATED',
                        f'{{"name":"{name}"}}', admin_id)
 
+        notify(conn, CATALOG_CHANNEL)
         conn.commit()
 
     return redirect(url_for('menu.mixes_list'))
@@ -178,6 +180,7 @@ def mix_toggle_active(mix_id):
             WHERE id = :mid
         """), {'mid': mix_id})
         _audit_log(conn, 'mix', mix_id, 'MIX_TOGGLED', '{}', admin_id)
+        notify(conn, CATALOG_CHANNEL)
         conn.commit()
 
     return redirect(url_for('menu.mixes_list'))
@@ -200,6 +203,7 @@ def mix_set_featured(mix_id):
             WHERE id = :mid
         """), {'mid': mix_id})
         _audit_log(conn, 'mix', mix_id, 'MIX_SET_FEATURED', '{}', admin_id)
+        notify(conn, CATALOG_CHANNEL)
         conn.commit()
 
     return redirect(url_for('menu.mixes_list'))
@@ -296,6 +300,7 @@ def _save_drink(engine, drink_id=None):
             _audit_log(conn, 'drink', str(new_id), 'DRINK_CREATED',
                        f'{{"name":"{name}"}}', admin_id)
 
+        notify(conn, CATALOG_CHANNEL)
         conn.commit()
 
     return redirect(url_for('menu.drinks_list'))
@@ -314,6 +319,7 @@ def drink_toggle_active(drink_id):
             WHERE id = :did
         """), {'did': drink_id})
         _audit_log(conn, 'drink', drink_id, 'DRINK_TOGGLED', '{}', admin_id)
+        notify(conn, CATALOG_CHANNEL)
         conn.commit()
 
     return redirect(url_for('menu.drinks_list'))
\ No newline at end of file
@@ -5,10 +5,14 @@ Spec 6.4: Order detail with status transitions.
 """
 
 import logging
-import requests as http_requests
 from flask import Blueprint, render_template, jsonify, request, session, redirect
 from sqlalchemy import text
 from admin.auth import login_required
+from backend.capacity import release_hookahs
+from backend.guest_stats import record_guest_cancel
+from backend.outbox import enqueue_notification
+from backend.pubsub import notify_order_event
+from backend.rollup import record_order_canceled, record_order_completed
 
 log = logging.getLogger("gg-hookah-admin.orders")
 
@@ -242,24 +246,11 @@ STATUS_TO_EVENT = {
 }
 
 
-def _notify(event, telegram_id, order_id_short, **extra):
-    """Fire-and-forget notification to bot notification server."""
-    try:
-        http_requests.post("http://127.0.0.1:5003/notify", json={
-            "event": event,
-            "telegram_id": telegram_id,
-            "order_id_short": order_id_short,
-            **extra,
-        }, timeout=2)
-    except Exception:
-        log.debug("Notification send failed for event=%s", event, exc_info=True)
-
-
 @orders_bp.route('/<order_id>/transition', methods=['POST'])
 @login_required
 def order_transition(order_id):
     """Change order status (spec 2.2)."""
-    from admin.app import engine
+    from admin.app import engine, settings_registry
     from datetime import datetime, timezone
 
     target = request.form.get('target_status')
@@ -269,9 +260,9 @@ def order_transition(order_id):
         return jsonify({'error': 'Missing target_status'}), 400
 
     with engine.connect() as conn:
-        # Get current order
+        # Get current order (locked: the ledger release below must run once)
         row = conn.execute(
-            text("SELECT id, status, telegram_id FROM orders WHERE id = :oid"),
+            text("SELECT id, status, telegram_id, hookah_count FROM orders WHERE id = :oid FOR UPDATE"),
             {'oid': order_id}
         ).mappings().first()
 
@@ -303,7 +294,8 @@ def order_transition(order_id):
 
         elif target == 'SESSION_ACTIVE':
             updates.append("session_started_at = now()")
-            updates.append("session_ends_at = now() + interval '120 minutes'")
+            updates.append("session_ends_at = now() + make_interval(mins => :duration)")
+            params['duration'] = settings_registry.snapshot().get('session_duration', 120)
             updates.append("free_extension_used = false")
 
         elif target == 'CANCELED':
@@ -312,6 +304,23 @@ def order_transition(order_id):
         set_clause = ", ".join(updates)
         conn.execute(text(f"UPDATE orders SET {set_clause} WHERE id = :oid"), params)
 
+        if target in ('COMPLETED', 'CANCELED'):
+            release_hookahs(conn, row['hookah_count'])
+        if target == 'COMPLETED':
+            record_order_completed(conn, order_id)
+        elif target == 'CANCELED':
+            record_order_canceled(conn, order_id)
+            record_guest_cancel(conn, order_id)
+        notify_order_event(conn, row['telegram_id'], order_id)
+
+        # Client notification, delivered by the bot from the outbox
+        event = STATUS_TO_EVENT.get(target)
+        if event and row['telegram_id']:
+            extra = {}
+            if target == 'CONFIRMED':
+                extra['eta_text'] = request.form.get('promised_eta_text', '')
+            enqueue_notification(conn, event, row['telegram_id'], order_id, **extra)
+
         # Audit log
         conn.execute(text("""
             INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
@@ -325,13 +334,4 @@ def order_transition(order_id):
 
         conn.commit()
 
-    # Send notification (fire-and-forget)
-    event = STATUS_TO_EVENT.get(target)
-    tg_id = row['telegram_id']
-    if event and tg_id:
-        extra = {}
-        if target == 'CONFIRMED':
-            extra['eta_text'] = request.form.get('promised_eta_text', '')
-        _notify(event, tg_id, str(order_id)[:8], **extra)
-
     return redirect(request.referrer or url_for('orders.order_detail', order_id=order_id))
\ No newline at end of file
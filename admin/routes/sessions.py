@@ -5,10 +5,13 @@ Sessions = orders with status SESSION_ACTIVE / SESSION_ENDING / WAITING_FOR_PICK
 """
 
 import logging
-import requests as http_requests
 from flask import Blueprint, render_template, jsonify, request, session, redirect, url_for
 from sqlalchemy import text
 from admin.auth import login_required
+from backend.capacity import release_hookahs
+from backend.outbox import enqueue_notification
+from backend.pubsub import notify_order_event
+from backend.rollup import record_order_completed
 from datetime import datetime, timezone
 
 log = logging.getLogger("gg-hookah-admin.sessions")
@@ -28,18 +31,17 @@ STATUS_COLORS = {
     'WAITING_FOR_PICKUP': '#e67e22',
 }
 
+# Client notification per session action / rebowl transition
+SESSION_ACTION_EVENTS = {
+    'force_ending': 'SESSION_ENDING',
+    'complete': 'ORDER_COMPLETED',
+    'free_extend': 'FREE_EXTENSION',
+}
 
-def _notify(event, telegram_id, order_id_short, **extra):
-    """Fire-and-forget notification to bot notification server."""
-    try:
-        http_requests.post("http://127.0.0.1:5003/notify", json={
-            "event": event,
-            "telegram_id": telegram_id,
-            "order_id_short": order_id_short,
-            **extra,
-        }, timeout=2)
-    except Exception:
-        log.debug("Notification send failed for event=%s", event, exc_info=True)
+REBOWL_EVENTS = {
+    'IN_PROGRESS': 'REBOWL_IN_PROGRESS',
+    'DONE': 'REBOWL_DONE',
+}
 
 
 def _compute_remaining(session_ends_at, status):
@@ -219,7 +221,7 @@ def session_detail(session_id):
 @login_required
 def session_action(session_id):
     """Handle session actions: force_ending, complete, free_extend, adjust_timer."""
-    from admin.app import engine
+    from admin.app import engine, settings_registry
 
     action = request.form.get('action')
     admin_id = session.get('admin_id')
@@ -229,7 +231,10 @@ def session_action(session_id):
 
     with engine.connect() as conn:
         row = conn.execute(
-            text("SELECT id, status, session_ends_at, free_extension_used, telegram_id FROM orders WHERE id = :oid"),
+            text("""
+                SELECT id, status, session_ends_at, free_extension_used, telegram_id, hookah_count
+                FROM orders WHERE id = :oid FOR UPDATE
+            """),
             {'oid': session_id}
         ).mappings().first()
 
@@ -258,6 +263,8 @@ def session_action(session_id):
                 UPDATE orders SET status = 'COMPLETED', completed_at = now(), updated_at = now()
                 WHERE id = :oid
             """), {'oid': session_id})
+            release_hookahs(conn, order['hookah_count'])
+            record_order_completed(conn, session_id)
 
             _audit_log(conn, session_id, 'ORDER_COMPLETED',
                        f'{{"from":"{order["status"]}"}}', admin_id)
@@ -268,17 +275,18 @@ def session_action(session_id):
             if order.get('free_extension_used'):
                 return jsonify({'error': 'Free extension already used'}), 400
 
+            ext_minutes = settings_registry.snapshot().get('free_extension', 60)
             conn.execute(text("""
                 UPDATE orders
                 SET status = 'SESSION_ACTIVE',
-                    session_ends_at = session_ends_at + interval '60 minutes',
+                    session_ends_at = session_ends_at + make_interval(mins => :mins),
                     free_extension_used = true,
                     updated_at = now()
                 WHERE id = :oid
-            """), {'oid': session_id})
+            """), {'oid': session_id, 'mins': ext_minutes})
 
             _audit_log(conn, session_id, 'FREE_EXTENSION_USED',
-                       '{"minutes":60}', admin_id)
+                       f'{{"minutes":{ext_minutes}}}', admin_id)
 
         elif action == 'adjust_timer':
             minutes = request.form.get('minutes', type=int)
@@ -298,18 +306,14 @@ def session_action(session_id):
         else:
             return jsonify({'error': f'Unknown action: {action}'}), 400
 
-        conn.commit()
+        notify_order_event(conn, order['telegram_id'], session_id)
 
-    # Send notification (fire-and-forget)
-    tg_id = order.get('telegram_id')
-    id_short = str(session_id)[:8]
-    if tg_id:
-        if action == 'force_ending':
-            _notify('SESSION_ENDING', tg_id, id_short)
-        elif action == 'complete':
-            _notify('ORDER_COMPLETED', tg_id, id_short)
-        elif action == 'free_extend':
-            _notify('FREE_EXTENSION', tg_id, id_short)
+        # Client notification, delivered by the bot from the outbox
+        event = SESSION_ACTION_EVENTS.get(action)
+        if event and order.get('telegram_id'):
+            enqueue_notification(conn, event, order['telegram_id'], session_id)
+
+        conn.commit()
 
     return redirect(url_for('sessions.session_detail', session_id=session_id))
 
@@ -369,14 +373,14 @@ def rebowl_transition(session_id, rebowl_id):
                 WHERE id = :rid
             """), {'rid': rebowl_id})
 
-            # Reset session: status → SESSION_ACTIVE, session_ends_at = now + 120m (spec 6.5.2)
+            # Reset session: status → SESSION_ACTIVE, session_ends_at = now + add_minutes (spec 6.5.2)
             conn.execute(text("""
                 UPDATE orders
                 SET status = 'SESSION_ACTIVE',
-                    session_ends_at = now() + interval '120 minutes',
+                    session_ends_at = now() + make_interval(mins => :mins),
                     updated_at = now()
                 WHERE id = :oid
-            """), {'oid': session_id})
+            """), {'oid': session_id, 'mins': rebowl['add_minutes']})
 
             # Update guest total_rebowls
             conn.execute(text("""
@@ -397,16 +401,15 @@ def rebowl_transition(session_id, rebowl_id):
                    f'{{"rebowl_id":"{rebowl_id}","from":"{rebowl["status"]}","to":"{target}"}}',
                    admin_id)
 
-        conn.commit()
+        if order_row:
+            notify_order_event(conn, order_row['telegram_id'], session_id)
 
-    # Send notification (fire-and-forget)
-    tg_id = order_row['telegram_id'] if order_row else None
-    id_short = str(session_id)[:8]
-    if tg_id:
-        if target == 'IN_PROGRESS':
-            _notify('REBOWL_IN_PROGRESS', tg_id, id_short)
-        elif target == 'DONE':
-            _notify('REBOWL_DONE', tg_id, id_short)
+        # Client notification, delivered by the bot from the outbox
+        event = REBOWL_EVENTS.get(target)
+        if event and order_row and order_row['telegram_id']:
+            enqueue_notification(conn, event, order_row['telegram_id'], session_id)
+
+        conn.commit()
 
     return redirect(url_for('sessions.session_detail', session_id=session_id))
 
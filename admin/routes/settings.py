@@ -8,6 +8,8 @@ import logging
 from flask import Blueprint, render_template, request, session, redirect, url_for, flash
 from sqlalchemy import text
 from admin.auth import login_required
+from backend.pubsub import SETTINGS_CHANNEL, notify
+from backend.settings import BOOLEAN_KEYS, setting_type
 
 log = logging.getLogger("gg-hookah-admin.settings")
 
@@ -101,41 +103,6 @@ CATEGORIES = [
     },
 ]
 
-# --- Type detection ---
-BOOLEAN_KEYS = {
-    'drinks_enabled', 'discount_hookah_only', 'promo_enabled',
-    'pause_orders', 'board_games_enabled', 'board_games_available_now',
-}
-
-TIME_KEYS = {
-    'work_start', 'work_end', 'late_order_cutoff_time',
-    'after_hours_disable_time',
-}
-
-NUMBER_KEYS = {
-    'base_bowl_price', 'rebowl_price', 'deposit_amount',
-    'session_duration', 'rebowl_duration', 'free_extension',
-    'free_extension_max_uses', 'drinks_max_total_qty',
-    'promo_per_phone_limit', 'total_hookahs',
-    'max_hookahs_regular', 'max_hookahs_event',
-    'event_min_hookahs', 'event_min_advance_hours',
-    'event_prepayment_percent', 'passport_retention_days',
-    'delivery_estimate_min', 'delivery_estimate_max',
-    'delivery_estimate_busy', 'first_order_discount',
-}
-
-
-def _get_type(key):
-    """Determine input type for a setting key."""
-    if key in BOOLEAN_KEYS:
-        return 'boolean'
-    if key in TIME_KEYS:
-        return 'time'
-    if key in NUMBER_KEYS:
-        return 'number'
-    return 'text'
-
-
 def _audit_log(conn, key, action, details, admin_id):
     """Insert audit log entry for setting change."""
     conn.execute(text("""
@@ -169,7 +136,7 @@ def settings_list():
         for key in cat['keys']:
             s = settings_map.get(key)
             if s:
-                s['input_type'] = _get_type(key)
+                s['input_type'] = setting_type(key)
                 items.append(s)
         if items:
             groups.append({
@@ -185,7 +152,7 @@ def settings_list():
     for cat in CATEGORIES:
         categorized_keys.update(cat['keys'])
     uncategorized = [
-        {**dict(r), 'input_type': _get_type(r['key'])}
+        {**dict(r), 'input_type': setting_type(r['key'])}
         for r in rows if r['key'] not in categorized_keys
     ]
     if uncategorized:
@@ -268,9 +235,13 @@ def settings_save():
                            admin_id)
                 changed += 1
 
+        if changed:
+            notify(conn, SETTINGS_CHANNEL)
         conn.commit()
 
     if changed:
+        from admin.app import settings_registry
+        settings_registry.invalidate()
         flash(f'Saved {changed} setting{"s" if changed != 1 else ""}.', 'success')
     else:
         flash('No changes detected.', 'info')
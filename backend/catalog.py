@@ -0,0 +1,141 @@
+"""
+In-process catalog cache for the Mini App menu endpoints.
+
+The menu only changes when an admin edits it, so /api/mixes,
+/api/mixes/featured and /api/drinks are served from pre-serialized JSON.
+Admin menu routes NOTIFY CATALOG_CHANNEL on commit; the listener bumps
+the version and the next request reloads everything in one connection.
+Mixes with the same sort_order are listed by popularity (mix_stats.score),
+which no NOTIFY tracks: the catalog is also reloaded every
+POPULARITY_REFRESH so that order follows recent checkouts.
+"""
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+
+from backend.http_cache import GZIP_MIN_SIZE, gzip_body, strong_etag
+from backend.pubsub import CATALOG_CHANNEL
+
+log = logging.getLogger("gg-hookah.catalog")
+
+# Safety net if the LISTEN connection is down and NOTIFYs are missed
+FALLBACK_TTL = 60  # seconds
+# Re-rank mixes by popularity even when the menu itself didn't change
+POPULARITY_REFRESH = 3600  # seconds
+
+
+# Serialized document with its strong ETag and gzip body (None if small)
+CatalogDoc = namedtuple("CatalogDoc", "body etag gzipped")
+
+
+def _serialize(data):
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    gzipped = gzip_body(body) if len(body) >= GZIP_MIN_SIZE else None
+    return CatalogDoc(body, strong_etag(body), gzipped)
+
+
+def _load_mixes(conn):
+    result = conn.execute(text("""
+        SELECT m.id, m.name, m.flavors, m.description,
+               m.strength, m.coolness, m.sweetness, m.smokiness,
+               m.details, m.image_url, m.is_active, m.is_featured
+        FROM mixes m
+        LEFT JOIN mix_stats s ON s.mix_id = m.id
+        WHERE m.is_active = true
+        ORDER BY m.sort_order, s.score DESC NULLS LAST, m.name
+    """))
+    mixes = []
+    for row in result:
+        mixes.append({
+            "id": str(row[0]),
+            "name": row[1],
+            "flavors": row[2],
+            "description": row[3],
+            "characteristics": {
+                "strength": row[4],
+                "coolness": row[5],
+                "sweetness": row[6],
+                "smokiness": row[7],
+            },
+            "details": row[8],
+            "image_url": row[9] or "",
+            "is_active": row[10],
+            "is_featured": row[11],
+            "price": 70,
+        })
+    return mixes
+
+
+def _load_drinks(conn):
+    result = conn.execute(text("""
+        SELECT id, name, price_gel, image_url, is_active
+        FROM menu_items
+        WHERE item_type = 'drink' AND is_active = true
+        ORDER BY sort_order, name
+    """))
+    drinks = []
+    for row in result:
+        drinks.append({
+            "id": str(row[0]),
+            "name": row[1],
+            "price": row[2],
+            "image_url": row[3] or "",
+            "is_active": row[4],
+        })
+    return drinks
+
+
+class CatalogCache:
+    """Versioned cache of serialized catalog documents.
+
+    Keys: "mixes", "featured", "drinks". Every invalidation bumps
+    `version`; a reload that raced with an invalidation is not trusted.
+    """
+
+    def __init__(self, engine, listener):
+        self.engine = engine
+        self.listener = listener
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._docs = {}
+        self._lock = threading.Lock()
+        listener.subscribe(CATALOG_CHANNEL, self.invalidate)
+
+    def invalidate(self, payload=None):
+        self.version += 1
+
+    def _is_fresh(self):
+        if self._loaded_version != self.version:
+            return False
+        ttl = FALLBACK_TTL if not self.listener.connected else POPULARITY_REFRESH
+        return time.monotonic() - self._loaded_at < ttl
+
+    def _reload(self):
+        version = self.version
+        with self.engine.connect() as conn:
+            mixes = _load_mixes(conn)
+            drinks = _load_drinks(conn)
+        featured = next((m for m in mixes if m["is_featured"]), None)
+        self._docs = {
+            "mixes": _serialize(mixes),
+            "featured": _serialize(featured),
+            "drinks": _serialize(drinks),
+        }
+        self._loaded_at = time.monotonic()
+        self._loaded_version = version
+        log.info("Catalog reloaded (version=%d, mixes=%d, drinks=%d)",
+                 version, len(mixes), len(drinks))
+
+    def get(self, key):
+        """Return the CatalogDoc for "mixes", "featured" or "drinks"."""
+        self.listener.ensure_started()
+        if not self._is_fresh():
+            with self._lock:
+                if not self._is_fresh():
+                    self._reload()
+        return self._docs[key]
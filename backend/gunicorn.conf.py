@@ -0,0 +1,24 @@
+"""
+gunicorn run config for the API:
+
+    gunicorn -c backend/gunicorn.conf.py backend.app:app
+
+Threaded workers: each open order stream (SSE, backend/order_stream.py)
+holds a thread for its whole lifetime. Every process gets MAX_STREAMS
+stream threads plus API_THREADS for ordinary requests; a stream past the
+cap is refused with 503, so streams can never starve the API.
+"""
+import os
+
+from backend.order_stream import MAX_STREAMS
+
+API_THREADS = int(os.getenv("API_THREADS", "8"))
+
+bind = os.getenv("BIND", "127.0.0.1:5001")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = MAX_STREAMS + API_THREADS
+timeout = 60
+graceful_timeout = 20
+keepalive = 5
+accesslog = "-"
@@ -0,0 +1,65 @@
+"""
+Conditional GET (strong ETag / If-None-Match) and gzip for JSON responses.
+
+Repeat visits from the Mini App mostly hit unchanged data, so answering
+304 saves bytes on slow mobile links. The gzip representation gets its
+own ETag suffix, as required for strong validators.
+"""
+import gzip
+import hashlib
+
+from flask import Response, request
+
+GZIP_MIN_SIZE = 1024  # bytes; smaller bodies aren't worth the CPU
+GZIP_SUFFIX = "-gz"
+
+
+def strong_etag(body):
+    """Content hash used as a strong ETag value (unquoted)."""
+    return hashlib.sha1(body).hexdigest()
+
+
+def gzip_body(body):
+    return gzip.compress(body, compresslevel=6)
+
+
+def _apply(resp, body, etag, gzipped=None):
+    """Pick representation, set validators, downgrade to 304 on match."""
+    use_gzip = len(body) >= GZIP_MIN_SIZE and request.accept_encodings["gzip"] > 0
+    if use_gzip:
+        etag += GZIP_SUFFIX
+    resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = "no-cache"
+
+    if request.if_none_match.contains(etag):
+        resp.status_code = 304
+        resp.set_data(b"")
+        return resp
+
+    if use_gzip:
+        resp.set_data(gzipped if gzipped is not None else gzip_body(body))
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp.set_data(body)
+    return resp
+
+
+def json_bytes_response(body, etag=None, gzipped=None):
+    """Response for pre-serialized JSON (precomputed etag/gzip optional)."""
+    resp = Response(mimetype="application/json")
+    return _apply(resp, body, etag or strong_etag(body), gzipped)
+
+
+def finalize_json_response(response):
+    """after_request hook: add ETag/304/gzip to plain 200 JSON GETs."""
+    if (
+        request.method != "GET"
+        or response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.is_streamed
+        or "ETag" in response.headers
+    ):
+        return response
+    body = response.get_data()
+    return _apply(response, body, strong_etag(body))
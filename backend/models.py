@@ -3,8 +3,8 @@ GG HOOKAH v2 — SQLAlchemy models
 Section 7 of GG_HOOKAH_Spec_Master_v2_1.docx
 """
 from sqlalchemy import (
-    Column, Text, Integer, SmallInteger, Boolean,
-    DateTime, ForeignKey, Index, UniqueConstraint, CheckConstraint,
+    Column, Text, Integer, SmallInteger, Boolean, Float,
+    Date, DateTime, ForeignKey, Index, UniqueConstraint, CheckConstraint,
     text as sa_text,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, BIGINT
@@ -30,7 +30,7 @@ class User(Base):
 class Guest(Base):
     __tablename__ = "guests"
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("gen_random_uuid()"))
-    phone = Column(Text, unique=True, nullable=False)
+    phone = Column(Text, unique=True, nullable=False)  # backend/phones.py canonical form
     telegram_id = Column(BIGINT, nullable=True, index=True)
     name = Column(Text, nullable=True)
     passport_photo_url = Column(Text, nullable=True)
@@ -39,10 +39,26 @@ class Guest(Base):
     notes = Column(Text, nullable=True)
     total_orders = Column(Integer, nullable=False, server_default="0")
     total_rebowls = Column(Integer, nullable=False, server_default="0")
+    # Maintained by backend/guest_stats.py
+    total_spent = Column(BIGINT, nullable=False, server_default="0")
+    last_order_at = Column(DateTime(timezone=True), nullable=True)
+    cancel_count = Column(Integer, nullable=False, server_default="0")
+    favorite_mix_id = Column(UUID(as_uuid=True), ForeignKey("mixes.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     __table_args__ = (
         Index("ix_guests_trust_flag", "trust_flag"),
+        # Keyset pagination of the admin guests list, one per sort
+        Index("ix_guests_created_at_id", sa_text("created_at DESC"), sa_text("id DESC")),
+        Index("ix_guests_total_spent_id", sa_text("total_spent DESC"), sa_text("id DESC")),
+        Index("ix_guests_last_order_at_id",
+              sa_text("COALESCE(last_order_at, '-infinity'::timestamptz) DESC"), sa_text("id DESC")),
+        # Admin search (pg_trgm): substring on phone / name, last digits on reverse(phone)
+        Index("ix_guests_phone_trgm", "phone", postgresql_using="gin",
+              postgresql_ops={"phone": "gin_trgm_ops"}),
+        Index("ix_guests_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_guests_phone_reversed", sa_text("reverse(phone) text_pattern_ops")),
     )
 
 
@@ -158,6 +174,8 @@ class Order(Base):
         Index("ix_orders_phone", "phone"),
         Index("ix_orders_created_at", "created_at"),
         Index("ix_orders_session_ends_at", "session_ends_at"),
+        Index("ix_orders_telegram_id_created_at", "telegram_id", sa_text("created_at DESC"), sa_text("id DESC")),
+        Index("ix_orders_guest_id_created_at", "guest_id", sa_text("created_at DESC")),
     )
 
 
@@ -274,3 +292,89 @@ class Setting(Base):
     description = Column(Text, nullable=True)
     updated_by_admin_telegram_id = Column(BIGINT, nullable=True)
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class HookahCapacity(Base):
+    __tablename__ = "hookah_capacity"
+    id = Column(SmallInteger, primary_key=True, server_default="1")
+    rented = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    __table_args__ = (
+        CheckConstraint("id = 1", name="ck_hookah_capacity_singleton"),
+        CheckConstraint("rented >= 0", name="ck_hookah_capacity_rented"),
+    )
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    id = Column(BIGINT, primary_key=True, autoincrement=True)
+    event = Column(Text, nullable=False)
+    telegram_id = Column(BIGINT, nullable=False)
+    order_id = Column(UUID(as_uuid=True), nullable=True)
+    payload = Column(JSONB, nullable=False, server_default="{}")
+    attempts = Column(SmallInteger, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    dead_at = Column(DateTime(timezone=True), nullable=True)  # gave up after MAX_ATTEMPTS
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    __table_args__ = (
+        Index("ix_notification_outbox_pending", "available_at", "id",
+              postgresql_where=sa_text("processed_at IS NULL")),
+        Index("ix_notification_outbox_dead", "dead_at",
+              postgresql_where=sa_text("dead_at IS NOT NULL")),
+    )
+
+
+class OrderStatusMessage(Base):
+    __tablename__ = "order_status_messages"
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+    chat_id = Column(BIGINT, nullable=False)
+    message_id = Column(BIGINT, nullable=False)
+    last_event = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshot"
+    id = Column(SmallInteger, primary_key=True, server_default="1")
+    data = Column(JSONB, nullable=False)
+    built_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    __table_args__ = (
+        CheckConstraint("id = 1", name="ck_dashboard_snapshot_singleton"),
+        {"prefixes": ["UNLOGGED"]},
+    )
+
+
+class DailyOrderStats(Base):
+    __tablename__ = "daily_order_stats"
+    day = Column(Date, primary_key=True)  # Tbilisi business day (starts 05:00)
+    orders_count = Column(Integer, nullable=False, server_default="0")
+    revenue_gel = Column(BIGINT, nullable=False, server_default="0")
+    canceled_count = Column(Integer, nullable=False, server_default="0")
+    completed_count = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class MixStats(Base):
+    __tablename__ = "mix_stats"
+    mix_id = Column(UUID(as_uuid=True), ForeignKey("mixes.id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, server_default="0")
+    item_count = Column(Integer, nullable=False, server_default="0")
+    score = Column(Float, nullable=False, server_default="0")  # see backend/mix_stats.py
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    __table_args__ = (
+        Index("ix_mix_stats_item_count", sa_text("item_count DESC")),
+    )
+
+
+class GuestMixStats(Base):
+    __tablename__ = "guest_mix_stats"
+    guest_id = Column(UUID(as_uuid=True), ForeignKey("guests.id", ondelete="CASCADE"), primary_key=True)
+    mix_id = Column(UUID(as_uuid=True), ForeignKey("mixes.id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, server_default="0")
+    last_ordered_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    __table_args__ = (
+        Index("ix_guest_mix_stats_favorite", "guest_id",
+              sa_text("order_count DESC"), sa_text("last_ordered_at DESC")),
+    )
@@ -0,0 +1,87 @@
+"""
+Live order updates for the Mini App over Server-Sent Events.
+
+Every writer that changes an order (admin, bot, client endpoints)
+NOTIFYs ORDER_EVENTS_CHANNEL in its transaction. The process-wide
+Listener feeds them into OrderEventHub, which wakes only the streams
+of the affected telegram_id. An idle stream holds a thread but no DB
+connection and makes no queries.
+
+Each open stream occupies a worker thread, so the backend runs threaded
+workers (backend/gunicorn.conf.py) and each process serves at most
+MAX_STREAMS of them: the rest of its threads stay free for API requests.
+Past the cap, open() refuses and the endpoint answers 503; the Mini App
+then polls /api/orders/active instead.
+"""
+import logging
+import os
+import queue
+import threading
+
+from backend.pubsub import ORDER_EVENTS_CHANNEL
+
+log = logging.getLogger("gg-hookah.order-stream")
+
+HEARTBEAT_INTERVAL = 15  # seconds; keeps proxies from closing idle streams
+MAX_STREAMS = int(os.getenv("ORDER_STREAMS_PER_PROCESS", "24"))
+
+
+class OrderEventHub:
+    """Fan-out of order_events notifications to per-user stream queues."""
+
+    def __init__(self, listener):
+        self.listener = listener
+        self._streams = {}  # telegram_id -> set of queue.Queue
+        self._lock = threading.Lock()
+        listener.subscribe(ORDER_EVENTS_CHANNEL, self._on_event)
+
+    def _on_event(self, payload):
+        with self._lock:
+            if payload is None:
+                # LISTEN reconnected: events may be lost, refresh everyone
+                targets = [q for qs in self._streams.values() for q in qs]
+            else:
+                targets = list(self._streams.get(int(payload["telegram_id"]), ()))
+        for q in targets:
+            q.put_nowait(payload)
+
+    def open(self, telegram_id):
+        """Register a stream; returns its event queue, or None at MAX_STREAMS."""
+        self.listener.ensure_started()
+        q = queue.Queue()
+        with self._lock:
+            if self._count() >= MAX_STREAMS:
+                return None
+            self._streams.setdefault(int(telegram_id), set()).add(q)
+        return q
+
+    def close(self, telegram_id, q):
+        with self._lock:
+            streams = self._streams.get(int(telegram_id))
+            if streams:
+                streams.discard(q)
+                if not streams:
+                    del self._streams[int(telegram_id)]
+
+    def wait(self, q):
+        """Block until this stream's user has a change; False on heartbeat timeout.
+
+        Bursts are coalesced: everything queued meanwhile is drained, so
+        the caller reloads once per burst.
+        """
+        try:
+            q.get(timeout=HEARTBEAT_INTERVAL)
+        except queue.Empty:
+            return False
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                return True
+
+    def _count(self):
+        return sum(len(qs) for qs in self._streams.values())
+
+    def stream_count(self):
+        with self._lock:
+            return self._count()
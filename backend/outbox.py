@@ -0,0 +1,36 @@
+"""
+Transactional outbox for Telegram notifications.
+
+Writers call enqueue_notification() in the same transaction as the
+status change: the notification exists if and only if the change was
+committed. The bot process drains the table (bot/services/outbox.py),
+so nothing blocks the request path and nothing is lost while the bot
+is restarting.
+"""
+import json
+
+from sqlalchemy import text
+
+from backend.pubsub import OUTBOX_CHANNEL, notify
+
+INSERT_OUTBOX_SQL = """
+    INSERT INTO notification_outbox (event, telegram_id, order_id, payload)
+    VALUES (:event, :tid, CAST(:oid AS uuid), CAST(:payload AS jsonb))
+"""
+
+
+def enqueue_notification(conn, event, telegram_id, order_id=None, **data):
+    """Queue a notification; `data` become template variables.
+
+    order_id_short is derived from order_id unless given explicitly.
+    """
+    if order_id is not None:
+        order_id = str(order_id)
+        data.setdefault("order_id_short", order_id[:8])
+    conn.execute(text(INSERT_OUTBOX_SQL), {
+        "event": event,
+        "tid": int(telegram_id),
+        "oid": order_id,
+        "payload": json.dumps(data),
+    })
+    notify(conn, OUTBOX_CHANNEL)
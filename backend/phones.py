@@ -0,0 +1,43 @@
+"""
+Phone normalization.
+
+Guests are keyed by phone, so every writer stores the canonical form:
+"+" and digits only (E.164), with Georgian national numbers (9 digits,
+optionally with the 0 trunk prefix) given the 995 country code. Typed
+separators, spaces and a 00 international prefix are dropped:
+
+    "555 12-34-56"        -> "+995555123456"
+    "0555123456"          -> "+995555123456"
+    "00995 555123456"     -> "+995555123456"
+    "+7 (912) 345-67-89"  -> "+79123456789"
+
+The admin guest search relies on it: last-digits lookups run on
+reverse(phone), see migration e4c7a1b9f362.
+"""
+import re
+
+COUNTRY_CODE = "995"
+NATIONAL_LENGTH = 9
+MIN_DIGITS = 7
+MAX_DIGITS = 15  # E.164
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def phone_digits(raw):
+    """Only the digits of `raw` (also for partial numbers typed in search)."""
+    return _NON_DIGITS.sub("", raw or "")
+
+
+def normalize_phone(raw):
+    """Canonical "+<digits>" form of a typed phone, or None if it isn't one."""
+    digits = phone_digits(raw)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if len(digits) == NATIONAL_LENGTH:
+        digits = COUNTRY_CODE + digits
+    elif len(digits) == NATIONAL_LENGTH + 1 and digits.startswith("0"):
+        digits = COUNTRY_CODE + digits[1:]
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS:
+        return None
+    return "+" + digits
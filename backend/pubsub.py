@@ -0,0 +1,141 @@
+"""
+Postgres LISTEN/NOTIFY helpers shared by backend and admin.
+
+Writers call notify() inside their transaction — Postgres delivers the
+message only after COMMIT, so listeners never react to rolled-back changes.
+Each process keeps one Listener thread with a dedicated connection.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+log = logging.getLogger("gg-hookah.pubsub")
+
+# --- Channels ---
+CATALOG_CHANNEL = "catalog_changed"
+SETTINGS_CHANNEL = "settings_changed"
+ORDER_EVENTS_CHANNEL = "order_events"  # payload: {"telegram_id", "order_id"}
+OUTBOX_CHANNEL = "notification_outbox"  # wakes the bot's outbox consumer
+
+
+def notify(conn, channel, payload=None):
+    """Queue a NOTIFY on the caller's connection (sent on commit)."""
+    conn.execute(
+        text("SELECT pg_notify(:ch, :payload)"),
+        {"ch": channel, "payload": json.dumps(payload) if payload is not None else ""},
+    )
+
+
+def notify_order_event(conn, telegram_id, order_id):
+    """Tell live Mini App streams that a user's order changed."""
+    notify(conn, ORDER_EVENTS_CHANNEL, {"telegram_id": int(telegram_id), "order_id": str(order_id)})
+
+
+# Same NOTIFY for set-based SQL (e.g. `SELECT ... FROM updated` in a CTE)
+ORDER_EVENT_NOTIFY_SQL = (
+    f"pg_notify('{ORDER_EVENTS_CHANNEL}', json_build_object("
+    "'telegram_id', telegram_id, 'order_id', id)::text)"
+)
+
+
+class Listener:
+    """Background LISTEN loop dispatching notifications to callbacks.
+
+    Callbacks receive the decoded payload (or None for an empty one).
+    After every (re)connect all callbacks are called with None too:
+    notifications sent while we were disconnected are lost, so
+    subscribers must treat None as "resync everything".
+    """
+
+    POLL_TIMEOUT = 5  # seconds between connection health checks
+    RECONNECT_DELAY = 5
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connected = False
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def subscribe(self, channel, callback):
+        """Register callback for channel and make sure the thread runs."""
+        with self._lock:
+            self._handlers.setdefault(channel, []).append(callback)
+        self.ensure_started()
+
+    def ensure_started(self):
+        """Start the listener thread (again after a fork, e.g. gunicorn)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self.connected = False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="pg-listener", daemon=True,
+            )
+            self._thread.start()
+
+    def _dispatch(self, channel, payload):
+        with self._lock:
+            callbacks = list(self._handlers.get(channel, ()))
+        for cb in callbacks:
+            try:
+                cb(payload)
+            except Exception:
+                log.exception("Listener callback failed for channel=%s", channel)
+
+    def _dispatch_all(self):
+        with self._lock:
+            channels = list(self._handlers)
+        for channel in channels:
+            self._dispatch(channel, None)
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                log.warning("LISTEN connection lost, reconnecting", exc_info=True)
+            self.connected = False
+            time.sleep(self.RECONNECT_DELAY)
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        raw.detach()  # long-lived, keep it out of the pool
+        dbapi_conn = raw.driver_connection
+        try:
+            dbapi_conn.autocommit = True
+            listening = set()
+            while True:
+                with self._lock:
+                    pending = set(self._handlers) - listening
+                for channel in pending:
+                    with dbapi_conn.cursor() as cur:
+                        cur.execute(f'LISTEN "{channel}"')
+                    listening.add(channel)
+                if pending and not self.connected:
+                    self.connected = True
+                    self._dispatch_all()
+
+                ready, _, _ = select.select([dbapi_conn], [], [], self.POLL_TIMEOUT)
+                if ready:
+                    dbapi_conn.poll()
+                else:
+                    # Idle: cheap round trip so a dead socket is noticed
+                    with dbapi_conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                while dbapi_conn.notifies:
+                    n = dbapi_conn.notifies.pop(0)
+                    payload = json.loads(n.payload) if n.payload else None
+                    self._dispatch(n.channel, payload)
+        finally:
+            try:
+                dbapi_conn.close()
+            except Exception:
+                pass
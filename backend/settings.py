@@ -0,0 +1,156 @@
+"""
+Typed settings registry shared by backend, admin and bot.
+
+The whole `settings` table is loaded in one query into an immutable
+snapshot with parsed values (bool / datetime.time / int / str).
+Admin settings_save NOTIFYs SETTINGS_CHANNEL on commit; the listener
+bumps the version and the next read reloads the snapshot.
+"""
+import logging
+import threading
+import time
+from datetime import time as dtime
+from types import MappingProxyType
+
+from sqlalchemy import text
+
+from backend.pubsub import SETTINGS_CHANNEL
+
+log = logging.getLogger("gg-hookah.settings")
+
+# Safety net if the LISTEN connection is down and NOTIFYs are missed
+FALLBACK_TTL = 60  # seconds
+
+SELECT_SETTINGS_SQL = "SELECT key, value FROM settings"
+
+# --- Type classification ---
+BOOLEAN_KEYS = {
+    'drinks_enabled', 'discount_hookah_only', 'promo_enabled',
+    'pause_orders', 'board_games_enabled', 'board_games_available_now',
+}
+
+TIME_KEYS = {
+    'work_start', 'work_end', 'late_order_cutoff_time',
+    'after_hours_disable_time',
+}
+
+NUMBER_KEYS = {
+    'base_bowl_price', 'rebowl_price', 'deposit_amount',
+    'session_duration', 'rebowl_duration', 'free_extension',
+    'free_extension_max_uses', 'drinks_max_total_qty',
+    'promo_per_phone_limit', 'total_hookahs',
+    'max_hookahs_regular', 'max_hookahs_event',
+    'event_min_hookahs', 'event_min_advance_hours',
+    'event_prepayment_percent', 'passport_retention_days',
+    'delivery_estimate_min', 'delivery_estimate_max',
+    'delivery_estimate_busy', 'first_order_discount',
+}
+
+
+def setting_type(key):
+    """Value type for a setting key: boolean, time, number or text."""
+    if key in BOOLEAN_KEYS:
+        return 'boolean'
+    if key in TIME_KEYS:
+        return 'time'
+    if key in NUMBER_KEYS:
+        return 'number'
+    return 'text'
+
+
+def parse_value(key, raw):
+    """Parse a raw settings.value string; None if it doesn't parse."""
+    kind = setting_type(key)
+    try:
+        if kind == 'boolean':
+            return raw.strip().lower() == 'true'
+        if kind == 'time':
+            hours, minutes = raw.strip().split(':')
+            return dtime(int(hours), int(minutes))
+        if kind == 'number':
+            return int(raw)
+    except (ValueError, AttributeError, TypeError):
+        log.warning("Setting %s has invalid %s value %r, using the default", key, kind, raw)
+        return None
+    return raw
+
+
+class SettingsSnapshot:
+    """Immutable, typed view of the settings table at one point in time."""
+
+    __slots__ = ("version", "values")
+
+    def __init__(self, version, values):
+        self.version = version
+        self.values = MappingProxyType(dict(values))
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+
+def build_snapshot(rows, version):
+    """Snapshot from (key, value) rows of SELECT_SETTINGS_SQL.
+
+    Unparsable values are left out, so get(key, default) falls back to
+    the caller's default.
+    """
+    values = {key: parse_value(key, value) for key, value in rows}
+    return SettingsSnapshot(version, {k: v for k, v in values.items() if v is not None})
+
+
+class SettingsRegistry:
+    """Per-process settings cache, invalidated via LISTEN/NOTIFY.
+
+    `engine` may be None for async callers that load rows themselves
+    and hand them to store() (see bot/db.py).
+    """
+
+    def __init__(self, engine, listener):
+        self.engine = engine
+        self.listener = listener
+        self.version = 0
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        listener.subscribe(SETTINGS_CHANNEL, self.invalidate)
+
+    def invalidate(self, payload=None):
+        self.version += 1
+
+    def _is_fresh(self):
+        snap = self._snapshot
+        if snap is None or snap.version != self.version:
+            return False
+        if not self.listener.connected:
+            return time.monotonic() - self._loaded_at < FALLBACK_TTL
+        return True
+
+    def cached(self):
+        """Current snapshot if still fresh, else None (never hits the DB)."""
+        return self._snapshot if self._is_fresh() else None
+
+    def store(self, rows, version):
+        """Install a snapshot loaded by the caller (e.g. an async driver).
+
+        `version` must be read before the rows were queried, so a reload
+        racing with an invalidation stays stale.
+        """
+        self._snapshot = build_snapshot(rows, version)
+        self._loaded_at = time.monotonic()
+        log.info("Settings reloaded (version=%d, keys=%d)", version, len(rows))
+        return self._snapshot
+
+    def snapshot(self):
+        """Current snapshot, reloading the table in one query if stale."""
+        self.listener.ensure_started()
+        if not self._is_fresh():
+            with self._lock:
+                if not self._is_fresh():
+                    version = self.version
+                    with self.engine.connect() as conn:
+                        rows = conn.execute(text(SELECT_SETTINGS_SQL)).fetchall()
+                    self.store(rows, version)
+        return self._snapshot
@@ -1,6 +1,6 @@
 """GG HOOKAH Telegram Bot — entry point.
 
-Runs aiogram 3.x polling bot with handlers for:
+Runs aiogram 3.x bot (webhook or polling, see BOT_MODE) with handlers for:
 - /start, /help, /language
 - Persistent buttons (Open App, My Order, Support)
 
@@ -14,12 +14,20 @@ import sys
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 
-from bot.config import BOT_TOKEN
+from bot import db
+from bot.config import (
+    BOT_DEBUG, BOT_MODE, BOT_TOKEN, LOOP_BLOCK_THRESHOLD_MS,
+    WEBHOOK_MAX_CONCURRENCY, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL,
+)
 from bot.handlers.start import router as start_router
 from bot.handlers.order_actions import router as order_actions_router
 from bot.handlers.session_actions import router as session_actions_router
 from bot.handlers.support import router as support_router
+from bot.middlewares.callback_ack import CallbackAckMiddleware
 from bot.notification_server import start_notification_server
+from bot.services.loop_monitor import loop_monitor
+from bot.services.outbox import outbox_loop
+from bot.services.sender import sender
 from bot.services.session_timer import session_timer_loop
 
 # --- Logging ---
@@ -32,10 +40,17 @@ log = logging.getLogger("gg-hookah-bot")
 
 
 async def main() -> None:
-    """Initialize bot and start polling."""
+    """Initialize bot and start webhook intake or polling."""
     if not BOT_TOKEN or BOT_TOKEN.startswith("{{"):
         log.error("BOT_TOKEN is not set! Check /etc/gg-hookah/.env")
         sys.exit(1)
+    webhook = BOT_MODE == "webhook"
+    if webhook and not WEBHOOK_SECRET:
+        log.error("BOT_MODE=webhook requires WEBHOOK_SECRET! Check /etc/gg-hookah/.env")
+        sys.exit(1)
+
+    # Loop lag stats on /health; stack dumps of blocking calls with BOT_DEBUG=1
+    loop_monitor.start(debug=BOT_DEBUG, block_threshold_ms=LOOP_BLOCK_THRESHOLD_MS)
 
     bot = Bot(
         token=BOT_TOKEN,
@@ -43,6 +58,9 @@ async def main() -> None:
     )
     dp = Dispatcher()
 
+    # Answer button taps before any DB work; drop double taps
+    dp.callback_query.outer_middleware(CallbackAckMiddleware())
+
     # Register routers (callback query routers first, catch-all LAST)
     dp.include_router(order_actions_router)
     dp.include_router(session_actions_router)
@@ -58,19 +76,44 @@ async def main() -> None:
         BotCommand(command="admin", description="Admin panel login"),
     ])
 
-    # Start notification HTTP server (runs in background)
-    await start_notification_server(bot)
-    log.info("Notification server ready on :5003")
+    # LISTEN/NOTIFY (settings, outbox) on the bot's event loop
+    db.listener.ensure_started()
+
+    # Rate-limited outbound queue for notifications / admin alerts
+    sender.start(bot)
+
+    # Start notification HTTP server (runs in background; serves the webhook too)
+    runner = await start_notification_server(bot, dp if webhook else None)
+
+    # Session scheduler runs in the leader replica only (advisory-lock lease)
+    db.leader.register("session_timer", lambda: session_timer_loop(bot))
+    db.leader.ensure_started()
 
-    # Start session timer cron (checks every 60s for expiring sessions)
-    asyncio.create_task(session_timer_loop(bot))
-    log.info("Session timer cron started")
+    # Deliver notifications queued by backend/admin (notification_outbox)
+    asyncio.create_task(outbox_loop(bot))
 
-    log.info("Bot starting polling...")
     try:
-        await dp.start_polling(bot)
+        if webhook:
+            await bot.set_webhook(
+                WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=WEBHOOK_MAX_CONCURRENCY,
+            )
+            log.info("Bot receiving updates via webhook %s", WEBHOOK_PATH)
+            await asyncio.Event().wait()
+        else:
+            # Local dev: getUpdates is rejected while a webhook is set
+            await bot.delete_webhook()
+            log.info("Bot starting polling...")
+            await dp.start_polling(bot)
     finally:
+        await runner.cleanup()
+        await loop_monitor.stop()
+        await db.leader.stop()
+        await sender.stop()
         await bot.session.close()
+        await db.engine.dispose()
 
 
 if __name__ == "__main__":
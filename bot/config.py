@@ -11,6 +11,20 @@ DATABASE_URL = os.getenv("DATABASE_URL", "")
 ADMIN_IDS = [int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()]
 DOMAIN = os.getenv("DOMAIN", "gghookah.delivery")
 
+# Update intake: "webhook" in production, "polling" for local dev
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", f"https://{DOMAIN}")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/tg/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "32"))
+
+# Debug: event-loop watchdog logs the stack of callbacks blocking longer than this
+BOT_DEBUG = os.getenv("BOT_DEBUG", "") == "1"
+LOOP_BLOCK_THRESHOLD_MS = int(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+# Local HTTP server (notifications + webhook); one port per replica
+BOT_HTTP_PORT = int(os.getenv("BOT_HTTP_PORT", "5003"))
+
 # Mini App URL (used for WebApp buttons)
 # Until DNS+SSL are ready, use IP-based URL
 MINI_APP_URL = "https://gghookah.delivery"
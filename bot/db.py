@@ -1,36 +1,82 @@
 """Async database helpers for the bot.
 
-Uses synchronous SQLAlchemy with run_in_executor for simplicity,
-since bot DB calls are infrequent (no need for full async driver).
+Native asyncio data layer: SQLAlchemy async engine on asyncpg, so
+handlers, background tasks and the notification server never wait for
+executor threads. LISTEN/NOTIFY runs on a dedicated asyncpg connection
+(bot.services.pg_listener); the leader lease for singleton background
+jobs holds another (bot.services.leader).
 """
 
-import asyncio
 from datetime import datetime
-from functools import partial
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 import pytz
+from backend.guest_stats import record_guest_cancel
+from backend.pubsub import ORDER_EVENT_NOTIFY_SQL
+from backend.rollup import record_order_canceled
+from backend.settings import SELECT_SETTINGS_SQL, SettingsRegistry
 from bot.config import DATABASE_URL
+from bot.services.leader import LeaderElection
+from bot.services.pg_listener import AsyncListener
+
+_url = make_url(DATABASE_URL)
 
 # Create engine once (shared across bot lifetime)
-engine = create_engine(DATABASE_URL, pool_size=5, pool_pre_ping=True)
+engine = create_async_engine(
+    _url.set(drivername="postgresql+asyncpg"),
+    pool_size=10, max_overflow=5, pool_pre_ping=True,
+)
+_dsn = _url.set(drivername="postgresql").render_as_string(hide_password=False)
+listener = AsyncListener(_dsn)
+# Advisory-lock lease: singleton jobs run in one replica only
+leader = LeaderElection(_dsn)
+settings_registry = SettingsRegistry(None, listener)
 
 
-def _execute_sync(query: str, params: dict | None = None) -> list[dict]:
-    """Execute a SQL query synchronously, return list of row dicts."""
-    with engine.connect() as conn:
-        result = conn.execute(text(query), params or {})
+async def execute(query: str, params: dict | None = None) -> list[dict]:
+    """Run one statement in its own transaction, return list of row dicts."""
+    # engine.begin() commits on exit — also for UPDATE ... RETURNING
+    async with engine.begin() as conn:
+        result = await conn.execute(text(query), params or {})
         # UPDATE/INSERT/DELETE don't return rows
         if result.returns_rows:
-            rows = result.mappings().all()
-            return [dict(r) for r in rows]
-        conn.commit()
+            return [dict(r) for r in result.mappings().all()]
         return []
 
 
-async def execute(query: str, params: dict | None = None) -> list[dict]:
-    """Run a sync DB query in executor (non-blocking for asyncio)."""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, partial(_execute_sync, query, params))
+async def get_settings():
+    """Typed settings snapshot (cached; reloaded in one query when stale)."""
+    snap = settings_registry.cached()
+    if snap is None:
+        version = settings_registry.version
+        rows = await execute(SELECT_SETTINGS_SQL)
+        snap = settings_registry.store([(r["key"], r["value"]) for r in rows], version)
+    return snap
+
+
+CLIENT_AUDIT_SQL = """
+    INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
+    VALUES (:etype, :eid, :action, :details, :tid)
+"""
+
+
+async def _audit_client_action(conn, entity_type: str, entity_id: str, action: str,
+                               telegram_id: int, details: str = '{"source":"telegram_bot"}') -> None:
+    """Audit row for a client action, in the caller's transaction."""
+    await conn.execute(text(CLIENT_AUDIT_SQL), {
+        "etype": entity_type, "eid": entity_id, "action": action,
+        "details": details, "tid": telegram_id,
+    })
+
+
+async def notify_order_changed(conn, order_id: str) -> None:
+    """NOTIFY order_events (sent on the caller's commit) so open Mini App
+    streams pick up the change."""
+    await conn.execute(
+        text(f"SELECT {ORDER_EVENT_NOTIFY_SQL} FROM orders WHERE id = :oid"),
+        {"oid": order_id},
+    )
 
 
 async def get_user_language(telegram_id: int) -> str:
@@ -72,53 +118,54 @@ async def get_active_order(telegram_id: int) -> dict | None:
 
 
 async def cancel_order(order_id: str, telegram_id: int) -> bool:
-    """Cancel an order (client action). Returns True if successful."""
-    rows = await execute(
-        """
-        UPDATE orders
-        SET status = 'CANCELED', canceled_at = now(), updated_at = now()
-        WHERE id = :oid
-          AND telegram_id = :tid
-          AND status IN ('NEW', 'CONFIRMED', 'ON_THE_WAY')
-        RETURNING id
-        """,
-        {"oid": order_id, "tid": telegram_id},
-    )
-    if rows:
-        await execute(
-            """
-            INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
-            VALUES ('order', :oid, 'CLIENT_CANCEL', '{"source":"telegram_bot"}', :tid)
-            """,
-            {"oid": order_id, "tid": telegram_id},
+    """Cancel an order (client action). Returns True if successful.
+
+    Releases the order's hookahs in the capacity ledger in the same statement
+    and moves the order to the canceled counts of the daily rollup and the
+    guest's stats; the audit row and the NOTIFY commit with it.
+    """
+    async with engine.begin() as conn:
+        row = (await conn.execute(text("""
+        WITH canceled AS (
+            UPDATE orders
+            SET status = 'CANCELED', canceled_at = now(), updated_at = now()
+            WHERE id = :oid
+              AND telegram_id = :tid
+              AND status IN ('NEW', 'CONFIRMED', 'ON_THE_WAY')
+            RETURNING id, hookah_count
+        ), released AS (
+            UPDATE hookah_capacity
+            SET rented = GREATEST(rented - (SELECT hookah_count FROM canceled), 0),
+                updated_at = now()
+            WHERE id = 1 AND EXISTS (SELECT 1 FROM canceled)
         )
-        return True
-    return False
+        SELECT id FROM canceled
+        """), {"oid": order_id, "tid": telegram_id})).first()
+        if not row:
+            return False
+        await conn.run_sync(record_order_canceled, order_id)
+        await conn.run_sync(record_guest_cancel, order_id)
+        await _audit_client_action(conn, "order", order_id, "CLIENT_CANCEL", telegram_id)
+        await notify_order_changed(conn, order_id)
+    return True
 
 
 async def set_ready_for_pickup(order_id: str, telegram_id: int) -> bool:
     """Client signals ready for pickup. Returns True if successful."""
-    rows = await execute(
-        """
+    async with engine.begin() as conn:
+        row = (await conn.execute(text("""
         UPDATE orders
         SET status = 'WAITING_FOR_PICKUP', pickup_requested_at = now(), updated_at = now()
         WHERE id = :oid
           AND telegram_id = :tid
           AND status IN ('SESSION_ACTIVE', 'SESSION_ENDING')
         RETURNING id
-        """,
-        {"oid": order_id, "tid": telegram_id},
-    )
-    if rows:
-        await execute(
-            """
-            INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
-            VALUES ('order', :oid, 'CLIENT_READY_PICKUP', '{"source":"telegram_bot"}', :tid)
-            """,
-            {"oid": order_id, "tid": telegram_id},
-        )
-        return True
-    return False
+        """), {"oid": order_id, "tid": telegram_id})).first()
+        if not row:
+            return False
+        await _audit_client_action(conn, "order", order_id, "CLIENT_READY_PICKUP", telegram_id)
+        await notify_order_changed(conn, order_id)
+    return True
 
 
 async def get_user_name(telegram_id: int) -> str:
@@ -139,11 +186,12 @@ async def get_user_name(telegram_id: int) -> str:
 
 async def apply_free_extension(order_id: str, telegram_id: int) -> bool:
     """Apply free +1h extension (client action). Returns True if successful."""
-    rows = await execute(
-        """
+    minutes = (await get_settings()).get("free_extension", 60)
+    async with engine.begin() as conn:
+        row = (await conn.execute(text("""
         UPDATE orders
         SET status = 'SESSION_ACTIVE',
-            session_ends_at = session_ends_at + interval '60 minutes',
+            session_ends_at = session_ends_at + make_interval(mins => :mins),
             free_extension_used = true,
             updated_at = now()
         WHERE id = :oid
@@ -151,19 +199,15 @@ async def apply_free_extension(order_id: str, telegram_id: int) -> bool:
           AND status = 'SESSION_ENDING'
           AND free_extension_used = false
         RETURNING id
-        """,
-        {"oid": order_id, "tid": telegram_id},
-    )
-    if rows:
-        await execute(
-            """
-            INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
-            VALUES ('order', :oid, 'CLIENT_FREE_EXTENSION', '{"source":"telegram_bot","minutes":60}', :tid)
-            """,
-            {"oid": order_id, "tid": telegram_id},
+        """), {"oid": order_id, "tid": telegram_id, "mins": minutes})).first()
+        if not row:
+            return False
+        await _audit_client_action(
+            conn, "order", order_id, "CLIENT_FREE_EXTENSION", telegram_id,
+            details=f'{{"source":"telegram_bot","minutes":{minutes}}}',
         )
-        return True
-    return False
+        await notify_order_changed(conn, order_id)
+    return True
 
 
 async def has_active_rebowl(order_id: str) -> bool:
@@ -186,24 +230,22 @@ async def create_rebowl_request(order_id: str, telegram_id: int, mix_id: str) ->
     if await has_active_rebowl(order_id):
         return False
 
-    rows = await execute(
-        """
+    cfg = await get_settings()
+    async with engine.begin() as conn:
+        row = (await conn.execute(text("""
         INSERT INTO rebowl_requests (order_id, requested_by_telegram_id, mix_id, price_gel, add_minutes, status)
-        VALUES (:oid, :tid, :mid, 50, 120, 'REQUESTED')
+        VALUES (:oid, :tid, :mid, :price, :minutes, 'REQUESTED')
         RETURNING id
-        """,
-        {"oid": order_id, "tid": telegram_id, "mid": mix_id},
-    )
-    if rows:
-        await execute(
-            """
-            INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
-            VALUES ('rebowl_request', :rid, 'CLIENT_REBOWL_REQUEST', :details, :tid)
-            """,
-            {"rid": str(rows[0]["id"]), "details": f'{{"source":"telegram_bot","order_id":"{order_id}"}}', "tid": telegram_id},
+        """), {"oid": order_id, "tid": telegram_id, "mid": mix_id,
+               "price": cfg.get("rebowl_price", 50), "minutes": cfg.get("rebowl_duration", 120)})).first()
+        if not row:
+            return False
+        await _audit_client_action(
+            conn, "rebowl_request", str(row[0]), "CLIENT_REBOWL_REQUEST", telegram_id,
+            details=f'{{"source":"telegram_bot","order_id":"{order_id}"}}',
         )
-        return True
-    return False
+        await notify_order_changed(conn, order_id)
+    return True
 
 
 async def save_support_message(
@@ -225,16 +267,19 @@ async def save_support_message(
 
 
 async def ensure_user_exists(telegram_id: int, first_name: str = "",
-                              last_name: str = "", username: str = "") -> None:
-    """Create user record if not exists (upsert)."""
-    with engine.connect() as conn:
-        conn.execute(text("""
-            INSERT INTO users (telegram_id, first_name, last_name, username, language)
-            VALUES (:tid, :fn, :ln, :un, 'ru')
-            ON CONFLICT (telegram_id) DO UPDATE
-            SET first_name = EXCLUDED.first_name,
-                last_name = EXCLUDED.last_name,
-                username = EXCLUDED.username,
-                updated_at = now()
-        """), {"tid": telegram_id, "fn": first_name, "ln": last_name, "un": username})
-        conn.commit()
\ No newline at end of file
+                              last_name: str = "", username: str = "") -> str:
+    """Create user record if not exists (upsert). Returns the user's language."""
+    rows = await execute(
+        """
+        INSERT INTO users (telegram_id, first_name, last_name, username, language)
+        VALUES (:tid, :fn, :ln, :un, 'ru')
+        ON CONFLICT (telegram_id) DO UPDATE
+        SET first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            username = EXCLUDED.username,
+            updated_at = now()
+        RETURNING language
+        """,
+        {"tid": telegram_id, "fn": first_name, "ln": last_name, "un": username},
+    )
+    return rows[0]["language"] or "ru"
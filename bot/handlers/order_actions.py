@@ -3,6 +3,8 @@
 F2.1: Cancel order, Ready for Pickup.
 Callback data format: "action:<action_name>" for initial actions,
 "confirm_cancel_yes" / "confirm_cancel_no" for cancel confirmation.
+Queries are answered up front by CallbackAckMiddleware; failures are
+reported with reply_error().
 """
 
 import logging
@@ -10,12 +12,12 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 
 from bot.db import (
-    get_active_order,
-    get_user_language,
-    get_user_name,
     cancel_order,
     set_ready_for_pickup,
 )
+from bot.middlewares.callback_ack import reply_error
+from bot.services.sender import Priority, sender
+from bot.services.user_context import get_user_context, invalidate_user_context
 from bot.templates import t
 from bot.keyboards.main import confirm_cancel_inline
 from bot.config import ADMIN_IDS
@@ -25,13 +27,10 @@ log = logging.getLogger("gg-hookah-bot.order-actions")
 
 
 async def _notify_admins(bot, template_key: str, lang: str = "ru", **kwargs) -> None:
-    """Send notification to all admin users."""
+    """Queue a notification to all admin users (rate-limited sender)."""
     text = t(template_key, lang, **kwargs)
     for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(admin_id, text)
-        except Exception:
-            log.warning("Failed to notify admin %s", admin_id)
+        sender.send_nowait(admin_id, text, priority=Priority.ADMIN)
 
 
 # --- Cancel flow ---
@@ -42,18 +41,18 @@ async def on_cancel_order(callback: CallbackQuery) -> None:
     if not callback.from_user or not callback.message:
         return
 
-    lang = await get_user_language(callback.from_user.id)
-    order = await get_active_order(callback.from_user.id)
+    ctx = await get_user_context(callback.from_user.id)
+    lang, order = ctx.language, ctx.active_order
 
     if not order:
         msg = "Нет активного заказа." if lang == "ru" else "No active order."
-        await callback.answer(msg, show_alert=True)
+        await reply_error(callback, msg)
         return
 
     if order["status"] not in ("NEW", "CONFIRMED", "ON_THE_WAY"):
         msg = ("Отмена недоступна на этом этапе." if lang == "ru"
                else "Cancellation is not available at this stage.")
-        await callback.answer(msg, show_alert=True)
+        await reply_error(callback, msg)
         return
 
     # Show confirmation
@@ -63,7 +62,6 @@ async def on_cancel_order(callback: CallbackQuery) -> None:
         confirm_text,
         reply_markup=confirm_cancel_inline(lang),
     )
-    await callback.answer()
 
 
 @router.callback_query(F.data == "confirm_cancel_yes")
@@ -72,25 +70,26 @@ async def on_confirm_cancel_yes(callback: CallbackQuery) -> None:
     if not callback.from_user or not callback.message:
         return
 
-    lang = await get_user_language(callback.from_user.id)
-    order = await get_active_order(callback.from_user.id)
+    ctx = await get_user_context(callback.from_user.id)
+    lang, order = ctx.language, ctx.active_order
 
     if not order:
         msg = "Нет активного заказа." if lang == "ru" else "No active order."
-        await callback.answer(msg, show_alert=True)
+        await reply_error(callback, msg)
         return
 
     order_id = str(order["id"])
     order_id_short = order_id[:8]
 
     success = await cancel_order(order_id, callback.from_user.id)
+    invalidate_user_context(callback.from_user.id)
 
     if success:
         # Confirm to client
         await callback.message.edit_text(t("order_canceled", lang, order_id_short=order_id_short))
 
         # Notify admins
-        client_name = await get_user_name(callback.from_user.id)
+        client_name = ctx.display_name
         await _notify_admins(
             callback.bot,
             "admin_client_cancel",
@@ -103,8 +102,6 @@ async def on_confirm_cancel_yes(callback: CallbackQuery) -> None:
                else "Cancellation is not available at this stage.")
         await callback.message.edit_text(msg)
 
-    await callback.answer()
-
 
 @router.callback_query(F.data == "confirm_cancel_no")
 async def on_confirm_cancel_no(callback: CallbackQuery) -> None:
@@ -112,10 +109,9 @@ async def on_confirm_cancel_no(callback: CallbackQuery) -> None:
     if not callback.from_user or not callback.message:
         return
 
-    lang = await get_user_language(callback.from_user.id)
+    lang = (await get_user_context(callback.from_user.id)).language
     msg = "Отмена отклонена." if lang == "ru" else "Cancel declined."
     await callback.message.edit_text(msg)
-    await callback.answer()
 
 
 # --- Ready for Pickup ---
@@ -126,31 +122,32 @@ async def on_ready_for_pickup(callback: CallbackQuery) -> None:
     if not callback.from_user or not callback.message:
         return
 
-    lang = await get_user_language(callback.from_user.id)
-    order = await get_active_order(callback.from_user.id)
+    ctx = await get_user_context(callback.from_user.id)
+    lang, order = ctx.language, ctx.active_order
 
     if not order:
         msg = "Нет активного заказа." if lang == "ru" else "No active order."
-        await callback.answer(msg, show_alert=True)
+        await reply_error(callback, msg)
         return
 
     if order["status"] not in ("SESSION_ACTIVE", "SESSION_ENDING"):
         msg = ("Эта функция доступна только во время сессии." if lang == "ru"
                else "This action is only available during an active session.")
-        await callback.answer(msg, show_alert=True)
+        await reply_error(callback, msg)
         return
 
     order_id = str(order["id"])
     order_id_short = order_id[:8]
 
     success = await set_ready_for_pickup(order_id, callback.from_user.id)
+    invalidate_user_context(callback.from_user.id)
 
     if success:
         # Confirm to client
         await callback.message.edit_text(t("pickup_requested", lang))
 
         # Notify admins
-        client_name = await get_user_name(callback.from_user.id)
+        client_name = ctx.display_name
         await _notify_admins(
             callback.bot,
             "admin_client_ready_pickup",
@@ -161,6 +158,4 @@ async def on_ready_for_pickup(callback: CallbackQuery) -> None:
     else:
         msg = ("Не удалось обновить статус." if lang == "ru"
                else "Could not update order status.")
-        await callback.answer(msg, show_alert=True)
-
-    await callback.answer()
+        await reply_error(callback, msg)
@@ -8,7 +8,8 @@ from aiogram import Router, F
 from aiogram.filters import CommandStart, Command
 from aiogram.types import Message
 
-from bot.db import get_user_language, get_active_order, ensure_user_exists, has_active_rebowl, is_after_hours
+from bot.db import ensure_user_exists, is_after_hours
+from bot.services.user_context import get_user_context, invalidate_user_context
 from bot.templates import t
 from bot.keyboards.main import main_keyboard, order_actions_keyboard, LABELS
 from bot.config import MINI_APP_URL, DOMAIN
@@ -23,15 +24,14 @@ async def cmd_start(message: Message) -> None:
     if not user:
         return
 
-    # Ensure user exists in DB
-    await ensure_user_exists(
+    # Ensure user exists in DB (names may have changed)
+    lang = await ensure_user_exists(
         telegram_id=user.id,
         first_name=user.first_name or "",
         last_name=user.last_name or "",
         username=user.username or "",
     )
-
-    lang = await get_user_language(user.id)
+    invalidate_user_context(user.id)
     await message.answer(
         t("welcome", lang),
         reply_markup=main_keyboard(lang, MINI_APP_URL),
@@ -44,7 +44,7 @@ async def cmd_help(message: Message) -> None:
     user = message.from_user
     if not user:
         return
-    lang = await get_user_language(user.id)
+    lang = (await get_user_context(user.id)).language
     await message.answer(t("help", lang))
 
 
@@ -56,7 +56,7 @@ async def cmd_language(message: Message) -> None:
         return
 
     # Get current language and toggle
-    current = await get_user_language(user.id)
+    current = (await get_user_context(user.id)).language
     new_lang = "en" if current == "ru" else "ru"
 
     # Update in DB
@@ -65,6 +65,7 @@ async def cmd_language(message: Message) -> None:
         "UPDATE users SET language = :lang, updated_at = now() WHERE telegram_id = :tid",
         {"lang": new_lang, "tid": user.id},
     )
+    invalidate_user_context(user.id)
 
     # Send confirmation with updated keyboard
     confirm = "Language switched to English" if new_lang == "en" else "Язык переключён на русский"
@@ -82,7 +83,7 @@ async def cmd_admin(message: Message) -> None:
     # Check if user is admin
     from admin.auth import is_admin, generate_login_token
     if not is_admin(user.id):
-        lang = await get_user_language(user.id)
+        lang = (await get_user_context(user.id)).language
         deny = "⛔ Доступ запрещён." if lang == "ru" else "⛔ Access denied."
         await message.answer(deny)
         return
@@ -108,8 +109,8 @@ async def btn_my_order(message: Message) -> None:
     if not user:
         return
 
-    lang = await get_user_language(user.id)
-    order = await get_active_order(user.id)
+    ctx = await get_user_context(user.id)
+    lang, order = ctx.language, ctx.active_order
 
     if not order:
         await message.answer(t("no_active_order", lang))
@@ -160,7 +161,7 @@ async def btn_my_order(message: Message) -> None:
 
     # Add action buttons based on order status
     order_id = str(order["id"])
-    active_rebowl = await has_active_rebowl(order_id) if status in ("SESSION_ACTIVE", "SESSION_ENDING") else False
+    active_rebowl = ctx.has_active_rebowl if status in ("SESSION_ACTIVE", "SESSION_ENDING") else False
     actions_kb = order_actions_keyboard(
         lang, status,
         free_extension_used=bool(order.get("free_extension_used")),
@@ -184,7 +185,7 @@ async def btn_support(message: Message) -> None:
     if not user:
         return
 
-    lang = await get_user_language(user.id)
+    lang = (await get_user_context(user.id)).language
     await message.answer(t("support_prompt", lang))
 
 
@@ -201,7 +202,7 @@ async def btn_open_app(message: Message) -> None:
     if not user:
         return
 
-    lang = await get_user_language(user.id)
+    lang = (await get_user_context(user.id)).language
     if lang == "ru":
         text = "🏠 Откройте приложение по ссылке:\nhttp://164.68.109.12"
     else:
@@ -12,11 +12,10 @@ from aiogram import Router, F
 from aiogram.types import Message
 
 from bot.db import (
-    get_active_order,
-    get_user_language,
-    get_user_name,
     save_support_message,
 )
+from bot.services.sender import Priority, sender
+from bot.services.user_context import get_user_context
 from bot.templates import t
 from bot.config import ADMIN_IDS
 
@@ -49,8 +48,8 @@ async def catch_all_support(message: Message) -> None:
     if not user or not message.text:
         return
 
-    lang = await get_user_language(user.id)
-    order = await get_active_order(user.id)
+    ctx = await get_user_context(user.id)
+    lang, order = ctx.language, ctx.active_order
     thread_type, thread_id = _determine_thread(order)
 
     # Save to DB
@@ -65,7 +64,7 @@ async def catch_all_support(message: Message) -> None:
     await message.answer(t("support_received", lang))
 
     # Notify admins
-    client_name = await get_user_name(user.id)
+    client_name = ctx.display_name
     thread_label = THREAD_LABELS.get(thread_type, {}).get("ru", thread_type)
     admin_text = t(
         "admin_support_message",
@@ -75,10 +74,7 @@ async def catch_all_support(message: Message) -> None:
         text=message.text,
     )
     for admin_id in ADMIN_IDS:
-        try:
-            await message.bot.send_message(admin_id, admin_text)
-        except Exception:
-            log.warning("Failed to notify admin %s about support message", admin_id)
+        sender.send_nowait(admin_id, admin_text, priority=Priority.ADMIN)
 
     log.info(
         "Support message from %s (type=%s): %s",
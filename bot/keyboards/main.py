@@ -3,8 +3,12 @@
 Spec 5.5: Persistent buttons — Open Mini App, Support, My Order.
 Note: WebApp button requires HTTPS. Until SSL is ready, we use a regular
 button and send the link as text.
+
+Keyboards are immutable and built once per distinct argument tuple
+(lru_cache): callers get shared instances and must not modify them.
 """
 
+from functools import lru_cache
 from aiogram.types import (
     ReplyKeyboardMarkup,
     KeyboardButton,
@@ -22,6 +26,7 @@ LABELS = {
 }
 
 
+@lru_cache(maxsize=None)
 def main_keyboard(lang: str = "ru", mini_app_url: str | None = None) -> ReplyKeyboardMarkup:
     """Persistent reply keyboard with main actions.
 
@@ -57,6 +62,21 @@ def order_actions_keyboard(
     free_extension_used: bool = True,
     has_active_rebowl: bool = False,
     after_hours: bool = False,
+) -> InlineKeyboardMarkup | None:
+    """Inline action buttons based on current order status (cached)."""
+    # Positional + bool(): one cache entry per (lang, status, flags)
+    return _order_actions_keyboard(
+        lang, status, bool(free_extension_used), bool(has_active_rebowl), bool(after_hours),
+    )
+
+
+@lru_cache(maxsize=256)
+def _order_actions_keyboard(
+    lang: str,
+    status: str,
+    free_extension_used: bool,
+    has_active_rebowl: bool,
+    after_hours: bool,
 ) -> InlineKeyboardMarkup | None:
     """Inline action buttons based on current order status.
 
@@ -108,6 +128,7 @@ def order_actions_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None
 
 
+@lru_cache(maxsize=None)
 def order_created_inline(lang: str = "ru") -> InlineKeyboardMarkup:
     """Inline buttons after order is created: Support."""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -118,6 +139,7 @@ def order_created_inline(lang: str = "ru") -> InlineKeyboardMarkup:
     ])
 
 
+@lru_cache(maxsize=None)
 def confirm_cancel_inline(lang: str = "ru") -> InlineKeyboardMarkup:
     """Confirmation for cancel order."""
     yes = "Да, отменить" if lang == "ru" else "Yes, cancel"
@@ -0,0 +1,108 @@
+"""Callback query middleware: acknowledge early, drop double taps.
+
+Registered as an outer middleware on dp.callback_query, so it runs for
+every button tap before filters and handlers:
+
+- the query is answered at most ACK_DELAY after the tap, so the client's
+  spinner stops before slow DB work finishes; handlers must not call
+  callback.answer() themselves and report failures with reply_error():
+  a failure found by cheap checks within ACK_DELAY is shown as an alert
+  (show_alert), later ones (after DB work) as a chat message,
+- a second tap with the same callback_data from the same user while the
+  first one is still running, or within DOUBLE_TAP_WINDOW after it, is
+  dropped (per process; the SQL status checks still guard across
+  replicas).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery
+
+log = logging.getLogger("gg-hookah-bot.callback-ack")
+
+ACK_DELAY = 0.3  # seconds a handler has to answer with an alert instead
+DOUBLE_TAP_WINDOW = 2.0  # seconds
+MAX_TRACKED_TAPS = 10000
+
+# Ids of queries being handled that nobody has answered yet
+_unanswered: set[str] = set()
+
+
+async def _answer(callback: CallbackQuery, text: str | None = None,
+                  show_alert: bool = False) -> bool:
+    """Answer the query unless already answered; True if this call did."""
+    if callback.id not in _unanswered:
+        return False
+    _unanswered.discard(callback.id)
+    try:
+        await callback.answer(text, show_alert=show_alert)
+    except TelegramBadRequest:
+        # Query too old (e.g. delivered late after a restart): still handle it
+        log.debug("Could not answer callback query %s", callback.id)
+        return False
+    return True
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    """Answer callback queries early and de-duplicate double taps."""
+
+    def __init__(self):
+        self._in_flight: set[tuple[int, str]] = set()
+        self._finished: dict[tuple[int, str], float] = {}
+
+    def _is_duplicate(self, key: tuple[int, str], now: float) -> bool:
+        if key in self._in_flight:
+            return True
+        finished = self._finished.get(key)
+        return finished is not None and now - finished < DOUBLE_TAP_WINDOW
+
+    def _prune(self, now: float) -> None:
+        if len(self._finished) > MAX_TRACKED_TAPS:
+            self._finished = {
+                k: ts for k, ts in self._finished.items() if now - ts < DOUBLE_TAP_WINDOW
+            }
+
+    @staticmethod
+    async def _answer_later(event: CallbackQuery) -> None:
+        await asyncio.sleep(ACK_DELAY)
+        # shield: the handler finishing must not cancel an answer in flight
+        await asyncio.shield(_answer(event))
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: dict[str, Any],
+    ) -> Any:
+        _unanswered.add(event.id)
+        key = (event.from_user.id, event.data or "")
+        now = time.monotonic()
+        if self._is_duplicate(key, now):
+            log.info("Dropped double tap: user=%s data=%s", key[0], key[1])
+            await _answer(event)
+            return None
+
+        self._in_flight.add(key)
+        ack = asyncio.create_task(self._answer_later(event))
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight.discard(key)
+            self._finished[key] = time.monotonic()
+            self._prune(self._finished[key])
+            ack.cancel()
+            # Handler done (or failed) before ACK_DELAY without answering
+            await _answer(event)
+
+
+async def reply_error(callback: CallbackQuery, text: str) -> None:
+    """Report a failed action: an alert while the query is still
+    unanswered (cheap checks), else a chat message (after DB work)."""
+    if await _answer(callback, text, show_alert=True):
+        return
+    if callback.message:
+        await callback.message.answer(text)
@@ -1,63 +1,253 @@
 """HTTP notification server — receives events from admin panel.
 
-Runs on 127.0.0.1:5003 as aiohttp web app alongside the bot polling loop.
-Admin sends POST /notify with JSON payload to trigger Telegram notifications.
+Runs on 127.0.0.1:5003 (BOT_HTTP_PORT) as aiohttp web app alongside the bot.
+POST /notify and POST /notify/batch validate, enqueue into a bounded
+in-memory queue and answer 202 right away; a dispatcher drains the queue
+into send_notification tasks (at most NOTIFY_MAX_IN_FLIGHT at a time). A full queue answers 429 with Retry-After.
+Nothing here survives a restart: backend and admin use the transactional
+notification_outbox instead (bot/services/outbox.py).
+
+In webhook mode the same app also serves Telegram updates on WEBHOOK_PATH
+(proxied by nginx): the secret token header is verified, the request is
+acked right away and the update is processed in the background, at most
+WEBHOOK_MAX_CONCURRENCY at a time. When all slots are busy the response
+is held, so Telegram backs off instead of updates piling up in memory.
 """
 
+import asyncio
 import logging
+import time
+from typing import Any
 from aiohttp import web
-from aiogram import Bot
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from bot.config import BOT_HTTP_PORT, WEBHOOK_MAX_CONCURRENCY, WEBHOOK_PATH, WEBHOOK_SECRET
+from bot.services.outbox import dead_count
+from bot.services.loop_monitor import loop_monitor
 from bot.services.notifications import send_notification
 
 log = logging.getLogger("gg-hookah-bot.notify-server")
 
 REQUIRED_FIELDS = ("event", "telegram_id", "order_id_short")
 
+NOTIFY_QUEUE_SIZE = 1000
+# Deliveries in flight at once. Most of them just wait out the card
+# debounce (notifications.CARD_DEBOUNCE); sends are paced by the sender.
+NOTIFY_MAX_IN_FLIGHT = 256
+MAX_BATCH_SIZE = 200
+RETRY_AFTER = 5         # seconds, sent with 429 when the queue is full
+
+
+class NotifyQueue:
+    """Bounded in-memory queue of notifications, drained into delivery tasks.
+
+    The dispatcher starts each delivery as its own task instead of
+    awaiting it: card events wait CARD_DEBOUNCE for their shared result,
+    and awaiting that would pace the whole queue. Tasks start in queue
+    order, so per-order event order is kept.
+    """
+
+    def __init__(self, bot: Bot, maxsize: int = NOTIFY_QUEUE_SIZE):
+        self.bot = bot
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._dispatcher: asyncio.Task | None = None
+        self._slots = asyncio.Semaphore(NOTIFY_MAX_IN_FLIGHT)
+        self._inflight: set[asyncio.Task] = set()
+        self.accepted = 0
+        self.rejected = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_latency = 0.0  # seconds from enqueue to send_notification done
+        self.max_latency = 0.0
+
+    def free_slots(self) -> int:
+        return self._queue.maxsize - self._queue.qsize()
+
+    def put_many(self, events: list[tuple[str, int, dict]]) -> bool:
+        """Enqueue all events or none; False when there isn't room."""
+        if len(events) > self.free_slots():
+            self.rejected += len(events)
+            return False
+        now = time.monotonic()
+        for event in events:
+            self._queue.put_nowait((now, *event))
+        self.accepted += len(events)
+        return True
+
+    async def _dispatch(self) -> None:
+        while True:
+            enqueued, event, telegram_id, data = await self._queue.get()
+            await self._slots.acquire()
+            task = asyncio.create_task(
+                send_notification(self.bot, event, telegram_id, data, data.get("order_id"))
+            )
+            self._inflight.add(task)
+            task.add_done_callback(lambda t, e=event, q=enqueued: self._delivered(t, e, q))
+
+    def _delivered(self, task: asyncio.Task, event: str, enqueued: float) -> None:
+        self._inflight.discard(task)
+        self._slots.release()
+        self._queue.task_done()
+        self.last_latency = time.monotonic() - enqueued
+        self.max_latency = max(self.max_latency, self.last_latency)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.failed += 1
+            log.error("Queued notification failed: event=%s", event, exc_info=task.exception())
+        elif task.result():
+            self.sent += 1
+        else:
+            self.failed += 1
+
+    async def start(self, app: web.Application) -> None:
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self, app: web.Application) -> None:
+        tasks = [t for t in (self._dispatcher, *self._inflight) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "in_flight": len(self._inflight),
+            "capacity": self._queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "sent": self.sent,
+            "failed": self.failed,
+            "last_drain_latency_ms": round(self.last_latency * 1000),
+            "max_drain_latency_ms": round(self.max_latency * 1000),
+        }
+
+
+def _parse_event(data) -> tuple[str, int, dict] | str:
+    """(event, telegram_id, template vars) or an error message."""
+    if not isinstance(data, dict):
+        return "Event must be an object"
+    missing = [f for f in REQUIRED_FIELDS if f not in data]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    data = dict(data)
+    event = data.pop("event")
+    telegram_id = data.pop("telegram_id")
+    # Everything else in data becomes template variables
+    return event, telegram_id, data
+
+
+def _enqueue(request: web.Request, events: list[tuple[str, int, dict]]) -> web.Response:
+    queue: NotifyQueue = request.app["notify_queue"]
+    if not queue.put_many(events):
+        log.warning("Notify queue full, rejecting %d event(s)", len(events))
+        return web.json_response(
+            {"ok": False, "error": "Queue full"},
+            status=429, headers={"Retry-After": str(RETRY_AFTER)},
+        )
+    return web.json_response({"ok": True, "queued": len(events)}, status=202)
+
 
 async def handle_notify(request: web.Request) -> web.Response:
-    """POST /notify — send a notification to a user."""
+    """POST /notify — queue a notification to a user."""
     try:
         data = await request.json()
     except Exception:
         return web.json_response({"ok": False, "error": "Invalid JSON"}, status=400)
 
-    # Validate required fields
-    missing = [f for f in REQUIRED_FIELDS if f not in data]
-    if missing:
-        return web.json_response(
-            {"ok": False, "error": f"Missing fields: {', '.join(missing)}"},
-            status=400,
-        )
+    parsed = _parse_event(data)
+    if isinstance(parsed, str):
+        return web.json_response({"ok": False, "error": parsed}, status=400)
+    return _enqueue(request, [parsed])
 
-    event = data.pop("event")
-    telegram_id = data.pop("telegram_id")
-
-    # Everything else in data becomes template variables
-    bot: Bot = request.app["bot"]
-    await send_notification(bot, event, telegram_id, data)
 
-    return web.json_response({"ok": True})
+async def handle_notify_batch(request: web.Request) -> web.Response:
+    """POST /notify/batch — queue an array of notifications (all or none)."""
+    try:
+        data = await request.json()
+    except Exception:
+        return web.json_response({"ok": False, "error": "Invalid JSON"}, status=400)
 
+    if not isinstance(data, list) or not data:
+        return web.json_response(
+            {"ok": False, "error": "Expected a non-empty array of events"}, status=400,
+        )
+    if len(data) > MAX_BATCH_SIZE:
+        return web.json_response(
+            {"ok": False, "error": f"At most {MAX_BATCH_SIZE} events per batch"}, status=413,
+        )
 
-async def handle_health(request: web.Request) -> web.Response:
-    """GET /health — simple health check."""
-    return web.json_response({"status": "ok"})
+    events = []
+    for i, item in enumerate(data):
+        parsed = _parse_event(item)
+        if isinstance(parsed, str):
+            return web.json_response({"ok": False, "error": f"[{i}] {parsed}"}, status=400)
+        events.append(parsed)
+    return _enqueue(request, events)
 
 
-def create_app(bot: Bot) -> web.Application:
-    """Create aiohttp app with bot instance attached."""
+async def handle_health(request: web.Request) -> web.Response:
+    """GET /health — health check with notify queue, outbox and event-loop stats."""
+    try:
+        outbox_stats = {"dead_count": await dead_count()}
+    except Exception as e:
+        outbox_stats = {"error": str(e)}
+    return web.json_response({
+        "status": "ok" if "error" not in outbox_stats else "degraded",
+        "notify_queue": request.app["notify_queue"].stats(),
+        "outbox": outbox_stats,
+        "event_loop": loop_monitor.stats(),
+    })
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Webhook handler processing updates in the background, bounded."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, limit: int, **kwargs: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True,
+                         secret_token=WEBHOOK_SECRET, **kwargs)
+        self._slots = asyncio.Semaphore(limit)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        # Hold the response while saturated: backpressure to Telegram
+        await self._slots.acquire()
+        try:
+            return await super()._handle_request_background(bot, request)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _background_feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot, update)
+        finally:
+            self._slots.release()
+
+
+def create_app(bot: Bot, dp: Dispatcher | None = None) -> web.Application:
+    """Create aiohttp app with bot instance attached (+ webhook if dp given)."""
     app = web.Application()
     app["bot"] = bot
+    app["notify_queue"] = queue = NotifyQueue(bot)
+    app.on_startup.append(queue.start)
+    app.on_cleanup.append(queue.stop)
     app.router.add_post("/notify", handle_notify)
+    app.router.add_post("/notify/batch", handle_notify_batch)
     app.router.add_get("/health", handle_health)
+    if dp is not None:
+        BoundedRequestHandler(dp, bot, WEBHOOK_MAX_CONCURRENCY).register(app, path=WEBHOOK_PATH)
     return app
 
 
-async def start_notification_server(bot: Bot) -> None:
+async def start_notification_server(bot: Bot, dp: Dispatcher | None = None) -> web.AppRunner:
     """Start the notification HTTP server (non-blocking)."""
-    app = create_app(bot)
+    app = create_app(bot, dp)
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, "127.0.0.1", 5003)
+    site = web.TCPSite(runner, "127.0.0.1", BOT_HTTP_PORT)
     await site.start()
-    log.info("Notification server started on http://127.0.0.1:5003")
+    log.info("Notification server started on http://127.0.0.1:%d", BOT_HTTP_PORT)
+    if dp is not None:
+        log.info("Webhook endpoint mounted at %s (max %d concurrent updates)",
+                 WEBHOOK_PATH, WEBHOOK_MAX_CONCURRENCY)
+    return runner
@@ -0,0 +1,130 @@
+"""Leader election for singleton background jobs (Postgres advisory lock).
+
+Several bot replicas may run side by side; jobs that must run exactly
+once (the session scheduler) are registered here and only run in the
+replica holding the lease:
+
+- the lease is a session-level pg_try_advisory_lock on a dedicated
+  asyncpg connection — Postgres releases it as soon as that connection
+  dies, so a crashed leader is replaced within one retry interval,
+- the leader heartbeats the connection; if a heartbeat fails or times
+  out, it cancels its jobs and closes the connection before anyone else
+  can take over (no overlap window); a job that died is restarted on
+  the next heartbeat,
+- TCP keepalives on the lease connection let the server drop a
+  partitioned leader's session quickly (the leader itself notices
+  within HEARTBEAT_INTERVAL + HEARTBEAT_TIMEOUT, well before that).
+
+Jobs that are already safe to run concurrently (outbox consumer, via
+FOR UPDATE SKIP LOCKED) don't need a lease.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import asyncpg
+
+log = logging.getLogger("gg-hookah-bot.leader")
+
+LEADER_LOCK_KEY = 0x6767_686B  # "gghk"
+HEARTBEAT_INTERVAL = 5  # seconds
+HEARTBEAT_TIMEOUT = 3   # seconds
+RETRY_INTERVAL = 5      # seconds between lock attempts as a follower
+
+KEEPALIVE_SETTINGS = {
+    "tcp_keepalives_idle": "10",
+    "tcp_keepalives_interval": "5",
+    "tcp_keepalives_count": "3",
+}
+
+
+class LeaderElection:
+    """Holds the lease on one connection and runs registered jobs while leader."""
+
+    def __init__(self, dsn: str, key: int = LEADER_LOCK_KEY):
+        self.dsn = dsn
+        self.key = key
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self._jobs: list[tuple[str, object]] = []
+        self._running: list[asyncio.Task] = []
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, factory) -> None:
+        """Run `factory()` (a coroutine function) only while this replica leads."""
+        self._jobs.append((name, factory))
+
+    def ensure_started(self) -> None:
+        """Start campaigning (needs a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _start_jobs(self) -> None:
+        self.is_leader = True
+        log.info("Acquired leadership (%s), starting %d job(s)", self.identity, len(self._jobs))
+        self._running = [
+            asyncio.create_task(factory(), name=f"leader:{name}")
+            for name, factory in self._jobs
+        ]
+
+    def _restart_dead_jobs(self) -> None:
+        """A job that returned or crashed is restarted while we still lead."""
+        for i, (name, factory) in enumerate(self._jobs):
+            task = self._running[i]
+            if not task.done():
+                continue
+            if task.cancelled():
+                log.error("Leader job %s was cancelled, restarting", name)
+            elif task.exception() is not None:
+                log.error("Leader job %s crashed, restarting", name, exc_info=task.exception())
+            else:
+                log.error("Leader job %s exited, restarting", name)
+            self._running[i] = asyncio.create_task(factory(), name=f"leader:{name}")
+
+    async def _stop_jobs(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        for task in self._running:
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._running = []
+        log.warning("Leadership released (%s), jobs stopped", self.identity)
+
+    async def _lead(self, conn: asyncpg.Connection) -> None:
+        """Heartbeat while leader; returns (raises) when the lease is in doubt."""
+        await self._start_jobs()
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await asyncio.wait_for(conn.fetchval("SELECT 1"), HEARTBEAT_TIMEOUT)
+            self._restart_dead_jobs()
+
+    async def _run(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn, server_settings={
+                    "application_name": f"gg-hookah-bot-leader {self.identity}",
+                    **KEEPALIVE_SETTINGS,
+                })
+                while True:
+                    if await conn.fetchval("SELECT pg_try_advisory_lock($1)", self.key):
+                        await self._lead(conn)
+                    await asyncio.sleep(RETRY_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning("Leader lease connection lost", exc_info=True)
+            finally:
+                # Stop jobs first: the lock must not be free while they run
+                await self._stop_jobs()
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(RETRY_INTERVAL)
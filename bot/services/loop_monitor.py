@@ -0,0 +1,106 @@
+"""Event-loop lag monitor and blocking-call watchdog.
+
+Polling/webhook intake, the notification server, the outbox consumer and
+the session scheduler all share one event loop, so any blocking call
+stalls every one of them.
+
+- A probe task sleeps PROBE_INTERVAL and records how late it woke up;
+  p50/p99/max over the last SAMPLE_WINDOW probes are exposed on /health.
+- In debug mode (BOT_DEBUG=1) a watchdog thread checks the probe's
+  heartbeat; when the loop hasn't run for BLOCK_THRESHOLD_MS it logs the
+  loop thread's current stack (the blocking call), once per stall.
+  asyncio's own debug mode is enabled too, which names slow callbacks.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+log = logging.getLogger("gg-hookah-bot.loop-monitor")
+
+PROBE_INTERVAL = 0.1    # seconds
+SAMPLE_WINDOW = 600     # probes kept (~1 minute)
+
+
+def _percentile(ordered: list[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class LoopMonitor:
+    """Measures loop lag; optionally watches for blocked callbacks."""
+
+    def __init__(self):
+        self._samples: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._heartbeat = time.monotonic()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.blocked_count = 0
+        self.longest_block = 0.0
+
+    def start(self, debug: bool = False, block_threshold_ms: int = 100) -> None:
+        """Start the probe (and the watchdog in debug mode) on the running loop."""
+        loop = asyncio.get_running_loop()
+        self._task = loop.create_task(self._probe())
+        if debug:
+            threshold = block_threshold_ms / 1000
+            loop.set_debug(True)
+            loop.slow_callback_duration = threshold
+            self._watchdog = threading.Thread(
+                target=self._watch, args=(threading.get_ident(), threshold),
+                name="loop-watchdog", daemon=True,
+            )
+            self._watchdog.start()
+        log.info("Loop monitor started (watchdog=%s)", "on" if debug else "off")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _probe(self) -> None:
+        while True:
+            expected = time.monotonic() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            now = time.monotonic()
+            self._samples.append(max(0.0, now - expected))
+            self._heartbeat = now
+
+    def _watch(self, loop_thread_id: int, threshold: float) -> None:
+        reported = False
+        while not self._stop.wait(threshold / 2):
+            stalled = time.monotonic() - self._heartbeat - PROBE_INTERVAL
+            if stalled < threshold:
+                reported = False
+                continue
+            self.longest_block = max(self.longest_block, stalled)
+            if reported:
+                continue
+            reported = True
+            self.blocked_count += 1
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+            log.warning("Event loop blocked for %.0f ms, loop thread stack:\n%s",
+                        stalled * 1000, stack)
+
+    def stats(self) -> dict:
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {"samples": 0}
+        return {
+            "samples": len(ordered),
+            "lag_p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+            "lag_p99_ms": round(_percentile(ordered, 0.99) * 1000, 1),
+            "lag_max_ms": round(ordered[-1] * 1000, 1),
+            "blocked_count": self.blocked_count,
+            "longest_block_ms": round(self.longest_block * 1000),
+        }
+
+
+# Process-wide instance, started in bot_main
+loop_monitor = LoopMonitor()
@@ -1,13 +1,21 @@
 """Notification service — format and send Telegram messages for order events.
 
-Called by the notification_server when admin triggers status changes.
+Called by the outbox consumer and the notification_server.
+
+Each order has one "order card" message (order_status_messages) that is
+edited in place as the status changes; events within a short window are
+coalesced into one edit. Only events that need the guest's attention
+(PING_EVENTS) send a new message, which then becomes the card.
 """
 
+import asyncio
 import logging
 from aiogram import Bot
 from bot import db
-from bot.templates import t
+from bot.templates import template
 from bot.keyboards.main import order_actions_keyboard
+from bot.services.sender import Priority, sender
+from bot.services.user_context import get_user_context
 
 log = logging.getLogger("gg-hookah-bot.notifications")
 
@@ -35,6 +43,43 @@ ADMIN_NOTIFY_EVENTS = {
     "WAITING_FOR_PICKUP": "admin_client_ready_pickup",
 }
 
+# Payload contract: template variables every producer of an event supplies
+# (enqueue_notification always derives order_id_short; admin adds eta_text)
+BASE_PAYLOAD_FIELDS = frozenset({"order_id_short"})
+EVENT_PAYLOAD_FIELDS = {
+    "ORDER_CONFIRMED": BASE_PAYLOAD_FIELDS | {"eta_text"},
+}
+SESSION_ENDING_TEMPLATES = ("session_ending_before_02", "session_ending_after_02")
+
+# Events that need attention: sent as a new message (ping), not an edit
+PING_EVENTS = {
+    "ON_THE_WAY",
+    "SESSION_ENDING",
+    "SESSION_ENDING_BEFORE_02",
+    "SESSION_ENDING_AFTER_02",
+}
+
+CARD_DEBOUNCE = 2.0  # seconds; card events for one order within it → one edit
+
+CARD_SQL = """
+    SELECT chat_id, message_id FROM order_status_messages
+    WHERE order_id = CAST(:oid AS uuid)
+"""
+
+SAVE_CARD_SQL = """
+    INSERT INTO order_status_messages (order_id, chat_id, message_id, last_event)
+    VALUES (CAST(:oid AS uuid), :chat_id, :message_id, :event)
+    ON CONFLICT (order_id) DO UPDATE
+    SET chat_id = EXCLUDED.chat_id, message_id = EXCLUDED.message_id,
+        last_event = EXCLUDED.last_event, updated_at = now()
+"""
+
+TOUCH_CARD_SQL = """
+    UPDATE order_status_messages
+    SET last_event = :event, updated_at = now()
+    WHERE order_id = CAST(:oid AS uuid)
+"""
+
 # Map event → order status (for attaching action buttons)
 EVENT_TO_STATUS = {
     "ORDER_CONFIRMED": "CONFIRMED",
@@ -57,69 +102,207 @@ def _resolve_session_ending() -> str:
     return "session_ending_before_02"
 
 
-async def send_notification(bot: Bot, event: str, telegram_id: int, data: dict) -> None:
+def _validate_catalog() -> None:
+    """Check every event template renders from its payload contract."""
+    errors = []
+    for event, template_key in EVENT_TEMPLATE_MAP.items():
+        payload = EVENT_PAYLOAD_FIELDS.get(event, BASE_PAYLOAD_FIELDS)
+        keys = SESSION_ENDING_TEMPLATES if template_key is None else (template_key,)
+        checks = [(key, payload) for key in keys]
+        if event in ADMIN_NOTIFY_EVENTS:
+            checks.append((ADMIN_NOTIFY_EVENTS[event], payload | {"client_name"}))
+        for key, available in checks:
+            missing = template(key).fields - available
+            if missing:
+                errors.append(f"{event} -> {key}: {sorted(missing)} not in payload")
+    if errors:
+        raise RuntimeError("Notification templates don't match payloads: " + "; ".join(errors))
+
+
+_validate_catalog()
+
+
+def _card_status(event: str, ctx, order_id: str | None) -> str | None:
+    """Order status whose buttons go on the message.
+
+    The card always shows the buttons for the order's current status (so a
+    rebowl update keeps the session buttons); plain messages use the event.
+    """
+    order = ctx.active_order
+    if order_id and order and str(order["id"]) == order_id:
+        return order["status"]
+    return EVENT_TO_STATUS.get(event)
+
+
+async def _deliver(bot: Bot, event: str, telegram_id: int, data: dict,
+                   order_id: str | None, ping: bool) -> bool:
+    """Render the event; edit the order card, or send a new message."""
+    # Resolve template key
+    if event == "SESSION_ENDING":
+        template_key = _resolve_session_ending()
+    else:
+        template_key = EVENT_TEMPLATE_MAP.get(event)
+
+    if not template_key:
+        log.warning("No template for event %s", event)
+        return True
+
+    # Language, active order, rebowl flag: one query. Reloaded because
+    # a notification means the order just changed.
+    ctx = await get_user_context(telegram_id, refresh=True)
+    lang = ctx.language
+
+    # Format message
+    text = template(template_key, lang).render(data)
+
+    # Attach action buttons if applicable
+    status = _card_status(event, ctx, order_id)
+    reply_markup = None
+    if status:
+        # For session events, fetch order data for smart buttons
+        free_ext_used = True  # default: hide extension button
+        active_rebowl = False
+        after_hours = db.is_after_hours()
+
+        if status in ("SESSION_ENDING", "SESSION_ACTIVE"):
+            order = ctx.active_order
+            if order:
+                free_ext_used = bool(order.get("free_extension_used"))
+                active_rebowl = ctx.has_active_rebowl
+
+        reply_markup = order_actions_keyboard(
+            lang, status,
+            free_extension_used=free_ext_used,
+            has_active_rebowl=active_rebowl,
+            after_hours=after_hours,
+        )
+
+    # Edit the order card in place (rate-limited queue, client priority)
+    edited = False
+    if order_id and not ping:
+        card = await db.execute(CARD_SQL, {"oid": order_id})
+        if card:
+            edited = await sender.edit_nowait(
+                card[0]["chat_id"], card[0]["message_id"], text, reply_markup=reply_markup,
+            )
+            if edited:
+                await db.execute(TOUCH_CARD_SQL, {"oid": order_id, "event": event})
+
+    # Pings, first status message, or the card is gone (deleted by the user)
+    if not edited:
+        message = await sender.send(telegram_id, text, reply_markup=reply_markup)
+        if not message:
+            return False
+        if order_id:
+            await db.execute(SAVE_CARD_SQL, {
+                "oid": order_id, "chat_id": message.chat.id,
+                "message_id": message.message_id, "event": event,
+            })
+    log.info("Notification %s: event=%s telegram_id=%s",
+             "edited" if edited else "sent", event, telegram_id)
+    return True
+
+
+async def _notify_admins(event: str, telegram_id: int, data: dict) -> None:
+    """Alert admins about a client's action (miniapp), apart from the card."""
+    from bot.config import ADMIN_IDS
+    try:
+        ctx = await get_user_context(telegram_id)
+        admin_text = template(ADMIN_NOTIFY_EVENTS[event]).render(
+            {**data, "client_name": ctx.display_name}
+        )
+    except Exception:
+        log.exception("Failed to build admin alert: event=%s telegram_id=%s", event, telegram_id)
+        return
+    for admin_id in ADMIN_IDS:
+        sender.send_nowait(admin_id, admin_text, priority=Priority.ADMIN)
+
+
+class _PendingCard:
+    """Latest event for an order card, waiting out the debounce window."""
+
+    __slots__ = ("event", "telegram_id", "data", "future", "handle")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.handle: asyncio.TimerHandle | None = None
+
+
+_pending_cards: dict[str, _PendingCard] = {}
+
+
+async def _flush_card(bot: Bot, order_id: str, pending: _PendingCard) -> None:
+    if _pending_cards.get(order_id) is pending:
+        del _pending_cards[order_id]
+    try:
+        ok = await _deliver(bot, pending.event, pending.telegram_id, pending.data,
+                            order_id, ping=False)
+    except Exception:
+        log.exception("Failed to update order card: event=%s order=%s",
+                      pending.event, order_id[:8])
+        ok = False
+    if not pending.future.done():
+        pending.future.set_result(ok)
+
+
+def _schedule_card_update(bot: Bot, event: str, telegram_id: int, data: dict,
+                          order_id: str) -> asyncio.Future:
+    """Coalesce card events within CARD_DEBOUNCE; all callers share one result."""
+    pending = _pending_cards.get(order_id)
+    if pending is None:
+        loop = asyncio.get_running_loop()
+        pending = _pending_cards[order_id] = _PendingCard(loop.create_future())
+        pending.handle = loop.call_later(
+            CARD_DEBOUNCE,
+            lambda: asyncio.create_task(_flush_card(bot, order_id, pending)),
+        )
+    pending.event, pending.telegram_id, pending.data = event, telegram_id, data
+    return pending.future
+
+
+def _cancel_card_update(order_id: str) -> None:
+    """A ping shows a newer state than any pending card edit: drop the edit."""
+    pending = _pending_cards.pop(order_id, None)
+    if pending is not None:
+        pending.handle.cancel()
+        if not pending.future.done():
+            pending.future.set_result(True)
+
+
+async def send_notification(bot: Bot, event: str, telegram_id: int, data: dict,
+                            order_id: str | None = None, notify_admins: bool = True) -> bool:
     """Format and send a notification message to a Telegram user.
 
+    With an order_id, status events update that order's card message in
+    place (coalesced over CARD_DEBOUNCE seconds); PING_EVENTS send a new
+    message, which becomes the card. ADMIN_NOTIFY_EVENTS also alert the
+    admins right away, whatever happens to the card.
+
     Args:
         bot: aiogram Bot instance
         event: event name (e.g. "ORDER_CONFIRMED")
         telegram_id: user's Telegram ID
         data: dict with template variables (order_id_short, eta_text, etc.)
+        order_id: order the event belongs to (None: always a new message)
+        notify_admins: False on retries, whose admin alert already went out
+
+    Returns:
+        False if sending to the user failed (worth retrying), else True.
     """
     try:
-        # Resolve template key
-        if event == "SESSION_ENDING":
-            template_key = _resolve_session_ending()
-        else:
-            template_key = EVENT_TEMPLATE_MAP.get(event)
-
-        if not template_key:
-            log.warning("No template for event %s", event)
-            return
-
-        # Get user language
-        lang = await db.get_user_language(telegram_id)
-
-        # Format message
-        text = t(template_key, lang, **data)
-
-        # Attach action buttons if applicable
-        status = EVENT_TO_STATUS.get(event)
-        reply_markup = None
-        if status:
-            # For session events, fetch order data for smart buttons
-            free_ext_used = True  # default: hide extension button
-            active_rebowl = False
-            after_hours = db.is_after_hours()
-
-            if status in ("SESSION_ENDING", "SESSION_ACTIVE"):
-                order = await db.get_active_order(telegram_id)
-                if order:
-                    free_ext_used = bool(order.get("free_extension_used"))
-                    active_rebowl = await db.has_active_rebowl(str(order["id"]))
-
-            reply_markup = order_actions_keyboard(
-                lang, status,
-                free_extension_used=free_ext_used,
-                has_active_rebowl=active_rebowl,
-                after_hours=after_hours,
-            )
-
-        # Send to user
-        await bot.send_message(telegram_id, text, reply_markup=reply_markup)
-        log.info("Notification sent: event=%s telegram_id=%s", event, telegram_id)
-
-        # Send admin notification if applicable (miniapp actions)
-        admin_template = ADMIN_NOTIFY_EVENTS.get(event)
-        if admin_template:
-            from bot.config import ADMIN_IDS
-            client_name = await db.get_user_name(telegram_id)
-            admin_text = t(admin_template, "ru", client_name=client_name, **data)
-            for admin_id in ADMIN_IDS:
-                try:
-                    await bot.send_message(admin_id, admin_text)
-                except Exception:
-                    log.warning("Failed to notify admin %s", admin_id)
-
+        card = None
+        # Nothing may be awaited before scheduling: call order = event order
+        if order_id and event not in PING_EVENTS:
+            card = _schedule_card_update(bot, event, telegram_id, data, order_id)
+        elif order_id:
+            _cancel_card_update(order_id)
+        # Not part of the card: neither coalesced nor held up by the debounce
+        if notify_admins and event in ADMIN_NOTIFY_EVENTS:
+            await _notify_admins(event, telegram_id, data)
+        if card is not None:
+            # shield: a cancelled caller must not cancel the shared result
+            return await asyncio.shield(card)
+        return await _deliver(bot, event, telegram_id, data, order_id, ping=True)
     except Exception:
         log.exception("Failed to send notification: event=%s telegram_id=%s", event, telegram_id)
+        return False
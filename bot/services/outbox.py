@@ -0,0 +1,183 @@
+"""Notification outbox consumer.
+
+Backend and admin write notifications into notification_outbox in the
+same transaction as the status change (backend/outbox.py). This task
+drains the table in batches into send_notification.
+
+Woken by NOTIFY on the outbox channel; a periodic poll picks up retries
+and anything enqueued while the bot or its LISTEN connection was down.
+Rows are claimed with FOR UPDATE SKIP LOCKED plus a lease, so a crash
+mid-batch only delays delivery until the lease expires.
+
+A row that fails MAX_ATTEMPTS times is dead-lettered (dead_at set, logged
+at error level): it is never retried, shows up in the bot's /health
+(dead_count) and is deleted after DEAD_RETENTION_DAYS. So is a row whose
+lease expired on its final attempt (the bot died mid-send): the claim no
+longer picks it up, so REAP_SQL marks it on the next poll.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from aiogram import Bot
+from backend.pubsub import OUTBOX_CHANNEL
+from bot import db
+from bot.services.notifications import send_notification
+
+log = logging.getLogger("gg-hookah-bot.outbox")
+
+BATCH_SIZE = 50
+POLL_INTERVAL = 30      # seconds; fallback when no NOTIFY arrives
+LEASE_SECONDS = 120     # claimed rows become visible again after this
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 30   # seconds, doubled per attempt
+PURGE_INTERVAL = 3600   # seconds between cleanups of processed and dead rows
+DEAD_RETENTION_DAYS = 30
+
+CLAIM_SQL = """
+    UPDATE notification_outbox
+    SET attempts = attempts + 1,
+        available_at = now() + make_interval(secs => :lease)
+    WHERE id IN (
+        SELECT id FROM notification_outbox
+        WHERE processed_at IS NULL
+          AND available_at <= now()
+          AND attempts < :max_attempts
+        ORDER BY id
+        LIMIT :n
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, event, telegram_id, order_id, payload, attempts
+"""
+
+DONE_SQL = """
+    UPDATE notification_outbox
+    SET processed_at = now(), last_error = NULL, dead_at = NULL
+    WHERE id = ANY(:ids)
+"""
+
+FAILED_SQL = """
+    UPDATE notification_outbox
+    SET last_error = :err, available_at = now() + make_interval(secs => :delay),
+        dead_at = CASE WHEN attempts >= :max_attempts THEN now() END
+    WHERE id = ANY(:ids)
+    RETURNING id, dead_at IS NOT NULL AS dead
+"""
+
+PURGE_SQL = """
+    DELETE FROM notification_outbox
+    WHERE processed_at < now() - interval '7 days'
+       OR dead_at < now() - make_interval(days => :dead_days)
+"""
+
+REAP_SQL = """
+    UPDATE notification_outbox
+    SET dead_at = now(), last_error = 'lease expired on final attempt'
+    WHERE processed_at IS NULL AND dead_at IS NULL
+      AND attempts >= :max_attempts
+      AND available_at <= now()
+    RETURNING id, event, telegram_id
+"""
+
+DEAD_COUNT_SQL = """
+    SELECT COUNT(*) AS n FROM notification_outbox WHERE dead_at IS NOT NULL
+"""
+
+
+async def _deliver_group(bot: Bot, event: str, telegram_id: int, group: list[dict]) -> None:
+    ids = [r["id"] for r in group]
+    order_id = str(group[0]["order_id"]) if group[0]["order_id"] else None
+    # Admins were alerted on the first attempt; retries only re-send to the guest
+    first_attempt = min(r["attempts"] for r in group) == 1
+    ok = await send_notification(bot, event, telegram_id, dict(group[0]["payload"]), order_id,
+                                 notify_admins=first_attempt)
+    if ok:
+        await db.execute(DONE_SQL, {"ids": ids})
+    else:
+        attempts = max(r["attempts"] for r in group)
+        rows = await db.execute(FAILED_SQL, {
+            "ids": ids,
+            "err": "send_notification failed",
+            "delay": RETRY_BASE_DELAY * 2 ** (attempts - 1),
+            "max_attempts": MAX_ATTEMPTS,
+        })
+        dead = [r["id"] for r in rows if r["dead"]]
+        if dead:
+            log.error("Outbox dead-lettered after %d attempts: ids=%s event=%s telegram_id=%s",
+                      MAX_ATTEMPTS, dead, event, telegram_id)
+
+
+async def reap_expired() -> int:
+    """Dead-letter rows whose final attempt never reported back."""
+    rows = await db.execute(REAP_SQL, {"max_attempts": MAX_ATTEMPTS})
+    for r in rows:
+        log.error("Outbox dead-lettered, lease expired on final attempt: id=%s event=%s telegram_id=%s",
+                  r["id"], r["event"], r["telegram_id"])
+    return len(rows)
+
+
+async def dead_count() -> int:
+    """Dead-lettered rows still kept (see DEAD_RETENTION_DAYS)."""
+    rows = await db.execute(DEAD_COUNT_SQL)
+    return rows[0]["n"]
+
+
+async def drain_batch(bot: Bot) -> int:
+    """Deliver one batch of due notifications. Returns rows claimed."""
+    rows = await db.execute(CLAIM_SQL, {
+        "lease": LEASE_SECONDS, "max_attempts": MAX_ATTEMPTS, "n": BATCH_SIZE,
+    })
+    if not rows:
+        return 0
+
+    # Coalesce bursts: identical events for the same order are sent once
+    groups: dict[tuple, list[dict]] = {}
+    for row in sorted(rows, key=lambda r: r["id"]):
+        # Untyped text() results: jsonb comes back as a JSON string
+        payload = row["payload"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        row["payload"] = payload or {}
+        key = (row["event"], row["telegram_id"], str(row["order_id"]),
+               json.dumps(payload, sort_keys=True))
+        groups.setdefault(key, []).append(row)
+
+    # Groups run concurrently: order card edits wait out a debounce window.
+    # Tasks start in id order, so per-order event order is kept.
+    await asyncio.gather(*(
+        _deliver_group(bot, event, telegram_id, group)
+        for (event, telegram_id, _, _), group in groups.items()
+    ))
+    return len(rows)
+
+
+async def outbox_loop(bot: Bot) -> None:
+    """Background task: deliver queued notifications as they arrive."""
+    wake = asyncio.Event()
+    db.listener.subscribe(OUTBOX_CHANNEL, lambda _payload: wake.set())
+    log.info("Outbox consumer started (batch=%d, poll=%ds)", BATCH_SIZE, POLL_INTERVAL)
+
+    last_purge = 0.0
+    while True:
+        try:
+            wake.clear()
+            while await drain_batch(bot) == BATCH_SIZE:
+                pass
+            await reap_expired()
+
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                await db.execute(PURGE_SQL, {"dead_days": DEAD_RETENTION_DAYS})
+                last_purge = time.monotonic()
+
+            try:
+                await asyncio.wait_for(wake.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+        except asyncio.CancelledError:
+            log.info("Outbox consumer stopped")
+            break
+        except Exception:
+            log.exception("Outbox drain failed")
+            await asyncio.sleep(POLL_INTERVAL)
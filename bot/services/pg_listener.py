@@ -0,0 +1,91 @@
+"""Asyncio LISTEN/NOTIFY listener for the bot (asyncpg).
+
+Same contract as backend.pubsub.Listener — subscribe(channel, cb),
+`connected`, callbacks get the decoded payload and None after every
+(re)connect ("resync everything") — but runs on the bot's event loop
+instead of a thread, so callbacks may touch asyncio objects directly.
+"""
+
+import asyncio
+import json
+import logging
+import asyncpg
+
+log = logging.getLogger("gg-hookah-bot.pg-listener")
+
+
+class AsyncListener:
+    """One dedicated asyncpg connection dispatching NOTIFYs to callbacks."""
+
+    HEALTH_INTERVAL = 30  # seconds between connection checks
+    RECONNECT_DELAY = 5
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.connected = False
+        self._handlers: dict[str, list] = {}
+        self._conn: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> None:
+        # Keep a reference until done (the loop only holds weak ones)
+        task = asyncio.get_running_loop().create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def subscribe(self, channel: str, callback) -> None:
+        """Register callback; LISTENs right away if already connected."""
+        self._handlers.setdefault(channel, []).append(callback)
+        if self._conn is not None and len(self._handlers[channel]) == 1:
+            self._spawn(self._conn.add_listener(channel, self._on_notify))
+
+    def unsubscribe(self, channel: str, callback) -> None:
+        """Remove a callback; UNLISTENs when it was the channel's last one."""
+        handlers = self._handlers.get(channel, [])
+        if callback in handlers:
+            handlers.remove(callback)
+        if not handlers:
+            self._handlers.pop(channel, None)
+            if self._conn is not None:
+                self._spawn(self._conn.remove_listener(channel, self._on_notify))
+
+    def ensure_started(self) -> None:
+        """Start the listener task (needs a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _dispatch(self, channel: str, payload) -> None:
+        for cb in list(self._handlers.get(channel, ())):
+            try:
+                cb(payload)
+            except Exception:
+                log.exception("Listener callback failed for channel=%s", channel)
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        self._dispatch(channel, json.loads(payload) if payload else None)
+
+    async def _run(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                for channel in list(self._handlers):
+                    await conn.add_listener(channel, self._on_notify)
+                self._conn = conn
+                self.connected = True
+                for channel in list(self._handlers):
+                    self._dispatch(channel, None)
+                while not conn.is_closed():
+                    await asyncio.sleep(self.HEALTH_INTERVAL)
+                    await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning("LISTEN connection lost, reconnecting", exc_info=True)
+            finally:
+                self.connected = False
+                self._conn = None
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(self.RECONNECT_DELAY)
@@ -0,0 +1,278 @@
+"""Outbound message scheduler respecting Telegram rate limits.
+
+Telegram allows ~30 messages/s per bot and ~1 message/s per chat. All
+proactive sends (notifications, admin alerts) go through per-chat
+queues and a ready-chat scheduler drained by a pool of workers:
+
+- a global token bucket caps total throughput,
+- a per-chat bucket keeps each chat at 1 msg/s; its queue keeps order,
+- a chat that must wait (its bucket, TelegramRetryAfter) is re-queued
+  on a timer instead of holding a worker, so a burst to a few admin
+  chats never delays an idle chat,
+- among ready chats, client status updates (Priority.CLIENT) go before
+  admin alerts (Priority.ADMIN).
+
+Order cards (bot/services/notifications.py) are edited in place through
+the same queue (edit_nowait), so edits share the per-chat budget.
+
+Direct replies to a user's own action (message.answer / edit_text in
+handlers) stay inline.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+)
+
+log = logging.getLogger("gg-hookah-bot.sender")
+
+GLOBAL_RATE = 30        # messages per second, whole bot
+PER_CHAT_RATE = 1       # messages per second, one chat
+WORKERS = 16
+MAX_ATTEMPTS = 4
+NETWORK_RETRY_DELAY = 2  # seconds
+MAX_IDLE_BUCKETS = 10000
+
+
+class Priority(IntEnum):
+    CLIENT = 0  # order status updates to guests
+    ADMIN = 1   # alerts / digests to admins
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() waits until a token is available."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def try_acquire(self) -> float:
+        """Take a token if available (returns 0), else seconds until one is."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class _Chat:
+    """Per-chat FIFO (by priority) and rate bucket; `scheduled` while the
+    chat is in the ready queue, waiting for its bucket, or being served."""
+
+    __slots__ = ("bucket", "pending", "scheduled")
+
+    def __init__(self):
+        self.bucket = TokenBucket(PER_CHAT_RATE, 1)
+        self.pending: list = []
+        self.scheduled = False
+
+
+class _Item:
+    __slots__ = ("text", "kwargs", "future", "attempts")
+
+    def __init__(self, text: str, kwargs: dict, future: asyncio.Future):
+        self.text = text
+        self.kwargs = kwargs
+        self.future = future
+        self.attempts = 0
+
+
+class OutboundSender:
+    """Priority send queue with global and per-chat rate limiting.
+
+    Messages wait in their chat's own queue; the shared ready queue only
+    holds chats that may send now, ordered by the priority of their next
+    message. A worker serves one message of a ready chat and moves on:
+    a chat waiting for its 1 msg/s slot (or a RetryAfter) is re-queued
+    with a timer, so it never holds a worker while other chats are idle.
+    """
+
+    def __init__(self):
+        self._bot: Bot | None = None
+        self._ready: asyncio.PriorityQueue | None = None
+        self._seq = itertools.count()
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self._chats: dict[int, _Chat] = {}
+        self._workers: list[asyncio.Task] = []
+        self._timers: set[asyncio.TimerHandle] = set()
+
+    def start(self, bot: Bot) -> None:
+        """Spawn the worker pool (call once the event loop is running)."""
+        self._bot = bot
+        self._ready = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(WORKERS)]
+        log.info("Outbound sender started (workers=%d, global=%d/s)", WORKERS, GLOBAL_RATE)
+
+    async def stop(self) -> None:
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for chat in self._chats.values():
+            for _, _, item in chat.pending:
+                if not item.future.done():
+                    item.future.set_result(False)
+            chat.pending.clear()
+            chat.scheduled = False
+
+    def qsize(self) -> int:
+        return sum(len(chat.pending) for chat in self._chats.values())
+
+    def send_nowait(self, chat_id: int, text: str,
+                    priority: Priority = Priority.CLIENT, **kwargs) -> asyncio.Future:
+        """Queue a message; the future resolves to the sent Message, or False."""
+        future = asyncio.get_running_loop().create_future()
+        chat = self._chat(chat_id)
+        heapq.heappush(chat.pending, (int(priority), next(self._seq), _Item(text, kwargs, future)))
+        if not chat.scheduled:
+            chat.scheduled = True
+            self._make_ready(chat_id)
+        return future
+
+    async def send(self, chat_id: int, text: str,
+                   priority: Priority = Priority.CLIENT, **kwargs):
+        """Queue a message and wait until it was delivered (Message) or given up (False)."""
+        return await self.send_nowait(chat_id, text, priority, **kwargs)
+
+    def edit_nowait(self, chat_id: int, message_id: int, text: str,
+                    priority: Priority = Priority.CLIENT, **kwargs) -> asyncio.Future:
+        """Queue an edit_message_text; the future resolves to True if applied."""
+        return self.send_nowait(chat_id, text, priority, message_id=message_id, **kwargs)
+
+    def _chat(self, chat_id: int) -> _Chat:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            if len(self._chats) > MAX_IDLE_BUCKETS:
+                self._chats = {
+                    cid: c for cid, c in self._chats.items()
+                    if c.scheduled or not c.bucket.is_full()
+                }
+            chat = self._chats[chat_id] = _Chat()
+        return chat
+
+    # --- Scheduling ---
+
+    def _make_ready(self, chat_id: int) -> None:
+        chat = self._chats.get(chat_id)
+        if chat is None or not chat.pending:
+            if chat is not None:
+                chat.scheduled = False
+            return
+        self._ready.put_nowait((chat.pending[0][0], next(self._seq), chat_id))
+
+    def _make_ready_later(self, chat_id: int, delay: float) -> None:
+        def fire():
+            self._timers.discard(handle)
+            self._make_ready(chat_id)
+
+        handle = asyncio.get_running_loop().call_later(delay, fire)
+        self._timers.add(handle)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, chat_id = await self._ready.get()
+            try:
+                await self._serve(chat_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Sender worker failed serving chat %s", chat_id)
+                self._make_ready_later(chat_id, NETWORK_RETRY_DELAY)
+            finally:
+                self._ready.task_done()
+
+    async def _serve(self, chat_id: int) -> None:
+        """Send the chat's next message, then re-queue the chat if it has more."""
+        chat = self._chats.get(chat_id)
+        if chat is None or not chat.pending:
+            if chat is not None:
+                chat.scheduled = False
+            return
+        wait = chat.bucket.try_acquire()
+        if wait > 0:
+            self._make_ready_later(chat_id, wait)
+            return
+
+        priority, seq, item = heapq.heappop(chat.pending)
+        retry_in = None
+        try:
+            await self._global.acquire()
+            retry_in = await self._attempt(chat_id, item)
+        except asyncio.CancelledError:
+            if not item.future.done():
+                item.future.set_result(False)
+            raise
+        if retry_in is not None:
+            # Back at the head of the chat's queue: per-chat order is kept
+            heapq.heappush(chat.pending, (priority, seq, item))
+
+        if retry_in:
+            self._make_ready_later(chat_id, retry_in)
+        else:
+            self._make_ready(chat_id)
+
+    async def _attempt(self, chat_id: int, item: _Item) -> float | None:
+        """One delivery attempt; resolves the future, or returns the retry delay."""
+        item.attempts += 1
+        result = False
+        try:
+            if "message_id" in item.kwargs:
+                await self._bot.edit_message_text(item.text, chat_id=chat_id, **item.kwargs)
+                result = True
+            else:
+                result = await self._bot.send_message(chat_id, item.text, **item.kwargs)
+        except TelegramRetryAfter as e:
+            log.warning("Rate limited sending to %s, retry in %ss", chat_id, e.retry_after)
+            if item.attempts < MAX_ATTEMPTS:
+                return e.retry_after
+        except TelegramForbiddenError:
+            log.info("Chat %s blocked the bot, dropping message", chat_id)
+        except TelegramBadRequest as e:
+            if "message is not modified" in e.message:
+                result = True
+            else:
+                log.warning("Bad request sending to %s: %s", chat_id, e.message)
+        except TelegramNetworkError:
+            log.warning("Network error sending to %s (attempt %d)", chat_id, item.attempts)
+            if item.attempts < MAX_ATTEMPTS:
+                return NETWORK_RETRY_DELAY * item.attempts
+        except Exception:
+            log.exception("Failed to send message to %s", chat_id)
+        if not item.future.done():
+            item.future.set_result(result)
+        return None
+
+
+# Process-wide instance, started in bot_main
+sender = OutboundSender()
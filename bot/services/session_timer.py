@@ -1,88 +1,262 @@
-"""Session timer cron — auto-transitions SESSION_ACTIVE → SESSION_ENDING.
+"""Session scheduler — deadline-driven SESSION_ACTIVE → SESSION_ENDING.
 
 Runs as asyncio background task inside the bot process.
-Every 60 seconds, checks for orders where session_ends_at is within 30 minutes
-and transitions them to SESSION_ENDING with audit log + user notification.
+Keeps an in-process min-heap of session deadlines and sleeps until the
+next one instead of polling the table:
+
+- SESSION_ACTIVE orders transition to SESSION_ENDING 30 minutes before
+  session_ends_at (audit log + client notification via the outbox),
+- sessions still not collected OVERDUE_GRACE after session_ends_at are
+  escalated to admins once per deadline.
+
+The heap is loaded at startup and kept current from order_events
+NOTIFYs (admin adjust_timer / free_extend, rebowl DONE, client actions),
+with a periodic full resync as a safety net. Firing runs one set-based
+UPDATE ... RETURNING (with audit + outbox rows in the same statement)
+for everything that is due.
 """
 
 import asyncio
+import heapq
 import logging
+from datetime import datetime, timedelta, timezone
 from aiogram import Bot
 from sqlalchemy import text
-from bot.db import engine
-from bot.services.notifications import send_notification
+from backend.pubsub import ORDER_EVENT_NOTIFY_SQL, ORDER_EVENTS_CHANNEL, OUTBOX_CHANNEL
+from bot import db
+from bot.config import ADMIN_IDS
+from bot.services.sender import Priority, sender
+from bot.templates import t
 
 log = logging.getLogger("gg-hookah-bot.session-timer")
 
-TICK_INTERVAL = 60  # seconds
+ENDING_LEAD = timedelta(minutes=30)     # SESSION_ENDING this long before the end
+OVERDUE_GRACE = timedelta(minutes=15)   # escalate this long after the end
+RESYNC_INTERVAL = 600                   # seconds between full reloads
+
+TRACKED_STATUSES = ("SESSION_ACTIVE", "SESSION_ENDING", "WAITING_FOR_PICKUP")
+
+LOAD_SQL = """
+    SELECT id, status, session_ends_at
+    FROM orders
+    WHERE status IN ('SESSION_ACTIVE', 'SESSION_ENDING', 'WAITING_FOR_PICKUP')
+      AND session_ends_at IS NOT NULL
+"""
+
+LOAD_ONE_SQL = """
+    SELECT id, status, session_ends_at
+    FROM orders
+    WHERE id = CAST(:oid AS uuid)
+"""
+
+# Transition + audit + outbox + NOTIFYs in one statement / transaction
+TRANSITION_SQL = f"""
+    WITH ending AS (
+        UPDATE orders
+        SET status = 'SESSION_ENDING', updated_at = now()
+        WHERE status = 'SESSION_ACTIVE'
+          AND session_ends_at <= :cutoff
+        RETURNING id, telegram_id
+    ), audit AS (
+        INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
+        SELECT 'order', id, 'AUTO_SESSION_ENDING', '{{"trigger":"session_scheduler"}}', 0
+        FROM ending
+    ), outbox AS (
+        INSERT INTO notification_outbox (event, telegram_id, order_id, payload)
+        SELECT 'SESSION_ENDING', telegram_id, id,
+               jsonb_build_object('order_id_short', left(id::text, 8))
+        FROM ending
+    )
+    SELECT id, telegram_id, {ORDER_EVENT_NOTIFY_SQL},
+           pg_notify('{OUTBOX_CHANNEL}', '')
+    FROM ending
+"""
+
+# Overdue sessions not yet escalated for their current deadline
+ESCALATE_SQL = """
+    WITH due AS (
+        SELECT o.id, o.telegram_id, o.status, o.address_text, o.session_ends_at
+        FROM orders o
+        WHERE o.status IN ('SESSION_ACTIVE', 'SESSION_ENDING', 'WAITING_FOR_PICKUP')
+          AND o.session_ends_at <= :overdue_before
+          AND NOT EXISTS (
+              SELECT 1 FROM audit_logs a
+              WHERE a.entity_type = 'order'
+                AND a.entity_id = o.id
+                AND a.action = 'AUTO_OVERDUE_ESCALATION'
+                AND a.created_at >= o.session_ends_at
+          )
+    ), audit AS (
+        INSERT INTO audit_logs (entity_type, entity_id, action, details, admin_telegram_id)
+        SELECT 'order', id, 'AUTO_OVERDUE_ESCALATION', '{"trigger":"session_scheduler"}', 0
+        FROM due
+    )
+    SELECT d.id, d.status, d.address_text, d.session_ends_at,
+           u.first_name, u.username, d.telegram_id
+    FROM due d
+    LEFT JOIN users u ON u.telegram_id = d.telegram_id
+"""
 
 
-def _transition_expiring_sessions() -> list[tuple[str, int]]:
-    """Find SESSION_ACTIVE orders expiring within 30 min, transition them.
+class SessionScheduler:
+    """Min-heap of (fire_at, order_id, session_ends_at) deadlines."""
 
-    Returns list of (order_id, telegram_id) for notification.
-    Runs synchronously (called via run_in_executor).
-    """
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT id, telegram_id
-            FROM orders
-            WHERE status = 'SESSION_ACTIVE'
-              AND session_ends_at <= now() + interval '30 minutes'
-        """)).mappings().all()
+    def __init__(self):
+        self._heap: list[tuple[float, str, float]] = []
+        self._deadlines: dict[str, float] = {}  # order_id -> session_ends_at
+        self._wake = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()  # refreshes from order events
 
-        if not rows:
-            return []
+    # --- Heap maintenance ---
 
-        transitioned = []
+    def _track(self, order_id: str, status: str, ends_at: datetime | None) -> None:
+        if status not in TRACKED_STATUSES or ends_at is None:
+            self._deadlines.pop(order_id, None)
+            return
+        ends = ends_at.timestamp()
+        if self._deadlines.get(order_id) == ends:
+            return
+        self._deadlines[order_id] = ends
+        if status == "SESSION_ACTIVE":
+            heapq.heappush(self._heap, (ends - ENDING_LEAD.total_seconds(), order_id, ends))
+        heapq.heappush(self._heap, (ends + OVERDUE_GRACE.total_seconds(), order_id, ends))
+
+    async def reload(self) -> None:
+        """Rebuild the heap from all running sessions."""
+        rows = await db.execute(LOAD_SQL)
+        self._heap.clear()
+        self._deadlines.clear()
         for row in rows:
-            oid = row["id"]
-            # Use WHERE status check to prevent race with admin panel
-            result = conn.execute(text("""
-                UPDATE orders
-                SET status = 'SESSION_ENDING', updated_at = now()
-                WHERE id = :oid AND status = 'SESSION_ACTIVE'
-            """), {"oid": oid})
-
-            if result.rowcount > 0:
-                conn.execute(text("""
-                    INSERT INTO audit_logs
-                        (entity_type, entity_id, action, details, admin_telegram_id)
-                    VALUES
-                        ('order', :oid, 'AUTO_SESSION_ENDING',
-                         '{"trigger":"timer_cron"}', 0)
-                """), {"oid": oid})
-                transitioned.append((str(oid), row["telegram_id"]))
-
-        conn.commit()
-        return transitioned
+            self._track(str(row["id"]), row["status"], row["session_ends_at"])
+        self._wake.set()
+        log.info("Session deadlines loaded: %d sessions", len(self._deadlines))
+
+    async def refresh(self, order_id: str) -> None:
+        """Re-read one order after an order_events NOTIFY."""
+        rows = await db.execute(LOAD_ONE_SQL, {"oid": order_id})
+        if rows:
+            self._track(order_id, rows[0]["status"], rows[0]["session_ends_at"])
+        else:
+            self._deadlines.pop(order_id, None)
+        self._wake.set()
+
+    def on_order_event(self, payload: dict | None) -> None:
+        if payload is None:
+            self._spawn(self.reload())
+        else:
+            self._spawn(self.refresh(payload["order_id"]))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Session refresh failed", exc_info=task.exception())
+
+    async def close(self) -> None:
+        """Cancel in-flight refreshes (the scheduler is being dropped)."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _next_fire_at(self) -> float | None:
+        """Earliest live deadline; entries superseded by a newer end are dropped."""
+        while self._heap:
+            fire_at, order_id, ends = self._heap[0]
+            if self._deadlines.get(order_id) == ends:
+                return fire_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            heapq.heappop(self._heap)
+
+    # --- Firing ---
+
+    async def _fire(self, now: datetime) -> None:
+        """Transition / escalate everything due as of `now` (set-based)."""
+        async with db.engine.begin() as conn:
+            ending = (await conn.execute(
+                text(TRANSITION_SQL), {"cutoff": now + ENDING_LEAD},
+            )).mappings().all()
+            overdue = (await conn.execute(
+                text(ESCALATE_SQL), {"overdue_before": now - OVERDUE_GRACE},
+            )).mappings().all()
+
+        for row in ending:
+            log.info("Auto SESSION_ENDING: order=%s telegram_id=%s",
+                     str(row["id"])[:8], row["telegram_id"])
+        for row in overdue:
+            self._escalate(row, now)
+
+    def _escalate(self, row, now: datetime) -> None:
+        order_id_short = str(row["id"])[:8]
+        first_name, username = row["first_name"], row["username"]
+        if first_name:
+            client_name = f"{first_name} (@{username})" if username else first_name
+        else:
+            client_name = f"@{username}" if username else str(row["telegram_id"])
+        text_ = t(
+            "admin_session_overdue", "ru",
+            overdue_min=int((now - row["session_ends_at"]).total_seconds() // 60),
+            order_id_short=order_id_short,
+            status=row["status"],
+            address=row["address_text"] or "—",
+            client_name=client_name,
+        )
+        log.warning("Session overdue: order=%s status=%s", order_id_short, row["status"])
+        for admin_id in ADMIN_IDS:
+            sender.send_nowait(admin_id, text_, priority=Priority.ADMIN)
+
+    # --- Main loop ---
+
+    async def run(self) -> None:
+        await self.reload()
+        loop = asyncio.get_running_loop()
+        next_resync = loop.time() + RESYNC_INTERVAL
+
+        while True:
+            if loop.time() >= next_resync:
+                await self.reload()
+                next_resync = loop.time() + RESYNC_INTERVAL
+
+            now = datetime.now(timezone.utc)
+            fire_at = self._next_fire_at()
+            if fire_at is not None and fire_at <= now.timestamp():
+                self._pop_due(now.timestamp())
+                await self._fire(now)
+                continue
+
+            timeout = next_resync - loop.time()
+            if fire_at is not None:
+                timeout = min(timeout, fire_at - now.timestamp())
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
 
 
 async def session_timer_loop(bot: Bot) -> None:
-    """Background task: check for expiring sessions every 60 seconds."""
-    log.info("Session timer cron started (interval=%ds)", TICK_INTERVAL)
-
-    while True:
-        try:
-            await asyncio.sleep(TICK_INTERVAL)
-
-            loop = asyncio.get_event_loop()
-            transitioned = await loop.run_in_executor(
-                None, _transition_expiring_sessions
-            )
-
-            for order_id, telegram_id in transitioned:
-                log.info(
-                    "Auto SESSION_ENDING: order=%s telegram_id=%s",
-                    order_id[:8], telegram_id,
-                )
-                await send_notification(
-                    bot, "SESSION_ENDING", telegram_id,
-                    {"order_id_short": order_id[:8]},
-                )
-
-        except asyncio.CancelledError:
-            log.info("Session timer cron stopped")
-            break
-        except Exception:
-            log.exception("Session timer tick failed")
+    """Background task: run the session deadline scheduler."""
+    log.info("Session scheduler started (lead=%s, overdue grace=%s)", ENDING_LEAD, OVERDUE_GRACE)
+    scheduler = SessionScheduler()
+    db.listener.subscribe(ORDER_EVENTS_CHANNEL, scheduler.on_order_event)
+    try:
+        while True:
+            try:
+                await scheduler.run()
+            except asyncio.CancelledError:
+                log.info("Session scheduler stopped")
+                break
+            except Exception:
+                log.exception("Session scheduler failed, restarting")
+                await asyncio.sleep(5)
+    finally:
+        # A new scheduler is built on every leadership change
+        db.listener.unsubscribe(ORDER_EVENTS_CHANNEL, scheduler.on_order_event)
+        await scheduler.close()
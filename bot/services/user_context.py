@@ -0,0 +1,122 @@
+"""Per-user context cache for bot handlers and notifications.
+
+Most handlers need the user's language, display name, active order and
+whether a rebowl is pending. UserContext loads all of it in one joined
+query and keeps it for a short TTL.
+
+Entries are dropped when a user's order changes (order_events NOTIFY
+from backend, admin and bot writers), and handlers invalidate them
+explicitly after their own writes (/language, actions). Stale reads are
+harmless for actions: every UPDATE re-checks the status in SQL.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from backend.pubsub import ORDER_EVENTS_CHANNEL
+from bot import db
+
+log = logging.getLogger("gg-hookah-bot.user-context")
+
+CONTEXT_TTL = 30        # seconds
+MAX_CACHED_USERS = 5000
+
+CONTEXT_SQL = """
+    SELECT u.language, u.first_name, u.username,
+           o.id, o.status, o.address_text, o.phone,
+           o.hookah_count, o.created_at, o.session_ends_at,
+           o.free_extension_used, o.mix_id, m.name AS mix_name,
+           EXISTS (
+               SELECT 1 FROM rebowl_requests r
+               WHERE r.order_id = o.id
+                 AND r.status IN ('REQUESTED', 'IN_PROGRESS')
+           ) AS has_active_rebowl
+    FROM (SELECT CAST(:tid AS bigint) AS telegram_id) t
+    LEFT JOIN users u ON u.telegram_id = t.telegram_id
+    LEFT JOIN LATERAL (
+        SELECT * FROM orders
+        WHERE telegram_id = t.telegram_id
+          AND status NOT IN ('COMPLETED', 'CANCELED')
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) o ON true
+    LEFT JOIN mixes m ON m.id = o.mix_id
+"""
+
+ORDER_FIELDS = (
+    "id", "status", "address_text", "phone", "hookah_count", "created_at",
+    "session_ends_at", "free_extension_used", "mix_id", "mix_name",
+)
+
+
+@dataclass(frozen=True)
+class UserContext:
+    telegram_id: int
+    language: str
+    display_name: str
+    active_order: dict | None
+    has_active_rebowl: bool
+
+
+_cache: "OrderedDict[int, tuple[float, UserContext]]" = OrderedDict()
+_generation = 0  # bumped on every invalidation; racing loads aren't cached
+
+
+def _display_name(telegram_id: int, first_name: str | None, username: str | None) -> str:
+    """Same format as db.get_user_name (used in admin notifications)."""
+    if first_name:
+        return f"{first_name} (@{username})" if username else first_name
+    if username:
+        return f"@{username}"
+    return str(telegram_id)
+
+
+async def _load(telegram_id: int) -> UserContext:
+    row = (await db.execute(CONTEXT_SQL, {"tid": telegram_id}))[0]
+    order = {k: row[k] for k in ORDER_FIELDS} if row["id"] is not None else None
+    return UserContext(
+        telegram_id=telegram_id,
+        language=row["language"] or "ru",
+        display_name=_display_name(telegram_id, row["first_name"], row["username"]),
+        active_order=order,
+        has_active_rebowl=bool(order and row["has_active_rebowl"]),
+    )
+
+
+async def get_user_context(telegram_id: int, refresh: bool = False) -> UserContext:
+    """Cached context for a user; one query on miss, expiry or refresh."""
+    now = time.monotonic()
+    entry = None if refresh else _cache.get(telegram_id)
+    if entry and now - entry[0] < CONTEXT_TTL:
+        _cache.move_to_end(telegram_id)
+        return entry[1]
+
+    generation = _generation
+    ctx = await _load(telegram_id)
+    if generation == _generation:
+        _cache[telegram_id] = (now, ctx)
+        _cache.move_to_end(telegram_id)
+        while len(_cache) > MAX_CACHED_USERS:
+            _cache.popitem(last=False)
+    return ctx
+
+
+def invalidate_user_context(telegram_id: int) -> None:
+    """Drop a user's cached context (after language change, order writes)."""
+    global _generation
+    _generation += 1
+    _cache.pop(telegram_id, None)
+
+
+def _on_order_event(payload: dict | None) -> None:
+    global _generation
+    if payload is None:
+        # LISTEN reconnected: events may have been missed
+        _generation += 1
+        _cache.clear()
+    else:
+        invalidate_user_context(int(payload["telegram_id"]))
+
+
+db.listener.subscribe(ORDER_EVENTS_CHANNEL, _on_order_event)
@@ -1,8 +1,14 @@
 """Message templates RU/EN for all bot events.
 
 Based on Spec Section 5.7. Each template is a dict with 'ru' and 'en' keys.
+TEMPLATES is compiled once into CATALOG (flat (key, lang) lookup, parsed
+placeholders); rendering with a missing placeholder raises instead of
+returning the raw template.
 """
 
+from dataclasses import dataclass
+from string import Formatter
+
 TEMPLATES = {
     # --- /start greeting ---
     "welcome": {
@@ -218,6 +224,22 @@ TEMPLATES = {
         ),
     },
 
+    # --- Admin notifications (session scheduler) ---
+    "admin_session_overdue": {
+        "ru": (
+            "🚨 Сессия просрочена на {overdue_min} мин\n"
+            "Заказ #{order_id_short} ({status})\n"
+            "Адрес: {address}\n"
+            "Клиент: {client_name}"
+        ),
+        "en": (
+            "🚨 Session overdue by {overdue_min} min\n"
+            "Order #{order_id_short} ({status})\n"
+            "Address: {address}\n"
+            "Client: {client_name}"
+        ),
+    },
+
     # --- Errors / info ---
     "no_active_order": {
         "ru": "У вас нет активного заказа. Оформите через приложение!",
@@ -240,16 +262,57 @@ TEMPLATES = {
 }
 
 
+LANGS = ("ru", "en")
+
+
+@dataclass(frozen=True, slots=True)
+class Template:
+    """One compiled template: text plus the placeholders it needs."""
+
+    key: str
+    lang: str
+    text: str
+    fields: frozenset[str]
+
+    def render(self, values: dict) -> str:
+        if not self.fields:
+            return self.text
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Template {self.key}/{self.lang} missing {sorted(missing)}")
+        return self.text.format_map(values)
+
+
+def _compile(templates: dict) -> dict[tuple[str, str], Template]:
+    """Flatten TEMPLATES into {(key, lang): Template}; ru fills missing langs."""
+    catalog = {}
+    for key, variants in templates.items():
+        fields = None
+        for lang in LANGS:
+            text = variants.get(lang, variants["ru"])
+            compiled = Template(key, lang, text, frozenset(
+                name for _, name, _, _ in Formatter().parse(text) if name
+            ))
+            if fields is not None and compiled.fields != fields:
+                raise ValueError(f"Template {key}: placeholders differ between languages")
+            fields = compiled.fields
+            catalog[key, lang] = compiled
+    return catalog
+
+
+# Built once at import; notifications validates it against event payloads
+CATALOG = _compile(TEMPLATES)
+
+
+def template(key: str, lang: str = "ru") -> Template:
+    """Compiled template for key/lang (unknown languages fall back to ru)."""
+    return CATALOG.get((key, lang)) or CATALOG[key, "ru"]
+
+
 def t(key: str, lang: str = "ru", **kwargs) -> str:
     """Get a translated template string.
 
     Usage: t("order_created", "en", order_id_short="abc123")
+    Raises KeyError for unknown keys and missing placeholders.
     """
-    template = TEMPLATES.get(key, {})
-    text = template.get(lang, template.get("ru", f"[missing template: {key}]"))
-    if kwargs:
-        try:
-            text = text.format(**kwargs)
-        except (KeyError, IndexError):
-            pass  # Return template as-is if format fails
-    return text
\ No newline at end of file
+    return template(key, lang).render(kwargs)
@@ -0,0 +1,37 @@
+"""add_hookah_capacity
+
+Revision ID: 3b7d2c9e1a40
+Revises: ffe00b36291f
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '3b7d2c9e1a40'
+down_revision: Union[str, None] = 'ffe00b36291f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('hookah_capacity',
+    sa.Column('id', sa.SmallInteger(), server_default='1', nullable=False),
+    sa.Column('rented', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('id = 1', name='ck_hookah_capacity_singleton'),
+    sa.CheckConstraint('rented >= 0', name='ck_hookah_capacity_rented'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Seed the ledger from currently active orders
+    op.execute("""
+        INSERT INTO hookah_capacity (id, rented)
+        SELECT 1, COALESCE(SUM(hookah_count), 0)
+        FROM orders
+        WHERE status IN ('NEW', 'CONFIRMED', 'ON_THE_WAY', 'DELIVERED',
+                         'SESSION_ACTIVE', 'SESSION_ENDING', 'WAITING_FOR_PICKUP')
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('hookah_capacity')
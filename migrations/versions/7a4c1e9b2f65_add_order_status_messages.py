@@ -0,0 +1,31 @@
+"""add_order_status_messages
+
+Revision ID: 7a4c1e9b2f65
+Revises: 5e2a9f7c3d18
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '7a4c1e9b2f65'
+down_revision: Union[str, None] = '5e2a9f7c3d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('order_status_messages',
+    sa.Column('order_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('chat_id', sa.BIGINT(), nullable=False),
+    sa.Column('message_id', sa.BIGINT(), nullable=False),
+    sa.Column('last_event', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_status_messages')
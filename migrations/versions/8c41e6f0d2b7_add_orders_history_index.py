@@ -0,0 +1,24 @@
+"""add_orders_history_index
+
+Revision ID: 8c41e6f0d2b7
+Revises: 3b7d2c9e1a40
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '8c41e6f0d2b7'
+down_revision: Union[str, None] = '3b7d2c9e1a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination of a user's order history: (created_at, id) DESC
+    op.create_index('ix_orders_telegram_id_created_at', 'orders',
+                    ['telegram_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_telegram_id_created_at', table_name='orders')
@@ -0,0 +1,31 @@
+"""add_dashboard_snapshot
+
+Revision ID: 9d3e5b7a1c42
+Revises: 7a4c1e9b2f65
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '9d3e5b7a1c42'
+down_revision: Union[str, None] = '7a4c1e9b2f65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # UNLOGGED: a cache, not worth WAL; emptied after a crash, rebuilt on demand
+    op.create_table('dashboard_snapshot',
+    sa.Column('id', sa.SmallInteger(), server_default='1', nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('built_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('id = 1', name='ck_dashboard_snapshot_singleton'),
+    sa.PrimaryKeyConstraint('id'),
+    prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dashboard_snapshot')
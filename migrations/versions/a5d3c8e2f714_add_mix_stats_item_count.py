@@ -0,0 +1,40 @@
+"""add_mix_stats_item_count
+
+Revision ID: a5d3c8e2f714
+Revises: e4c7a1b9f362
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'a5d3c8e2f714'
+down_revision: Union[str, None] = 'e4c7a1b9f362'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mix_stats', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    # Backfill: hookah lines per mix, what Top Mixes counted before mix_stats
+    op.execute("""
+        UPDATE mix_stats s SET item_count = c.cnt
+        FROM (
+            SELECT mix_id, COUNT(*) AS cnt
+            FROM order_items
+            WHERE item_type = 'hookah' AND mix_id IS NOT NULL
+            GROUP BY mix_id
+        ) c
+        WHERE s.mix_id = c.mix_id
+    """)
+    # Top Mixes now sorts on item_count; nothing reads mix_stats by order_count
+    op.drop_index('ix_mix_stats_order_count', table_name='mix_stats')
+    op.create_index('ix_mix_stats_item_count', 'mix_stats',
+                    [sa.text('item_count DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mix_stats_item_count', table_name='mix_stats')
+    op.create_index('ix_mix_stats_order_count', 'mix_stats',
+                    [sa.text('order_count DESC')], unique=False)
+    op.drop_column('mix_stats', 'item_count')
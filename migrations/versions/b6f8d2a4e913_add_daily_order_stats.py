@@ -0,0 +1,48 @@
+"""add_daily_order_stats
+
+Revision ID: b6f8d2a4e913
+Revises: 9d3e5b7a1c42
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'b6f8d2a4e913'
+down_revision: Union[str, None] = '9d3e5b7a1c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_order_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue_gel', sa.BIGINT(), server_default='0', nullable=False),
+    sa.Column('canceled_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('completed_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    # Backfill from existing orders (Tbilisi business day, starts at 05:00)
+    op.execute("""
+        INSERT INTO daily_order_stats
+            (day, orders_count, revenue_gel, canceled_count, completed_count)
+        SELECT day,
+               COUNT(*) FILTER (WHERE status != 'CANCELED'),
+               COALESCE(SUM(total) FILTER (WHERE status != 'CANCELED'), 0),
+               COUNT(*) FILTER (WHERE status = 'CANCELED'),
+               COUNT(*) FILTER (WHERE status = 'COMPLETED')
+        FROM (
+            SELECT ((o.created_at AT TIME ZONE 'Asia/Tbilisi') - interval '5 hours')::date AS day,
+                   o.status,
+                   (SELECT COALESCE(SUM(oi.total_price_gel), 0)
+                    FROM order_items oi WHERE oi.order_id = o.id) AS total
+            FROM orders o
+        ) per_order
+        GROUP BY day
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('daily_order_stats')
@@ -0,0 +1,71 @@
+"""add_mix_stats
+
+Revision ID: c3a9e7f1d205
+Revises: b6f8d2a4e913
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'c3a9e7f1d205'
+down_revision: Union[str, None] = 'b6f8d2a4e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('mix_stats',
+    sa.Column('mix_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('score', sa.Float(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['mix_id'], ['mixes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('mix_id')
+    )
+    op.create_index('ix_mix_stats_order_count', 'mix_stats',
+                    [sa.text('order_count DESC')], unique=False)
+    op.create_table('guest_mix_stats',
+    sa.Column('guest_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('mix_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_ordered_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['guest_id'], ['guests.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['mix_id'], ['mixes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('guest_id', 'mix_id')
+    )
+    # Favorite mix of a guest: first row of (order_count, last_ordered_at) DESC
+    op.create_index('ix_guest_mix_stats_favorite', 'guest_mix_stats',
+                    ['guest_id', sa.text('order_count DESC'), sa.text('last_ordered_at DESC')],
+                    unique=False)
+    # Backfill from existing orders (score: 30-day half-life from 2025-01-01)
+    op.execute("""
+        INSERT INTO mix_stats (mix_id, order_count, score)
+        SELECT mix_id, COUNT(*),
+               SUM(power(2.0, extract(epoch FROM created_at - TIMESTAMPTZ '2025-01-01 00:00:00+00')
+                              / 2592000))
+        FROM (
+            SELECT DISTINCT oi.mix_id, o.id, o.created_at
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            WHERE oi.item_type = 'hookah' AND oi.mix_id IS NOT NULL
+        ) per_order
+        GROUP BY mix_id
+    """)
+    op.execute("""
+        INSERT INTO guest_mix_stats (guest_id, mix_id, order_count, last_ordered_at)
+        SELECT o.guest_id, oi.mix_id, COUNT(DISTINCT o.id), MAX(o.created_at)
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        WHERE oi.item_type = 'hookah' AND oi.mix_id IS NOT NULL
+          AND o.guest_id IS NOT NULL
+        GROUP BY o.guest_id, oi.mix_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_guest_mix_stats_favorite', table_name='guest_mix_stats')
+    op.drop_table('guest_mix_stats')
+    op.drop_index('ix_mix_stats_order_count', table_name='mix_stats')
+    op.drop_table('mix_stats')
@@ -0,0 +1,73 @@
+"""add_guest_stats_columns
+
+Revision ID: d8b2f4a6c913
+Revises: c3a9e7f1d205
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'd8b2f4a6c913'
+down_revision: Union[str, None] = 'c3a9e7f1d205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('guests', sa.Column('total_spent', sa.BIGINT(), server_default='0', nullable=False))
+    op.add_column('guests', sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('guests', sa.Column('cancel_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('guests', sa.Column('favorite_mix_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key('guests_favorite_mix_id_fkey', 'guests', 'mixes',
+                          ['favorite_mix_id'], ['id'], ondelete='SET NULL')
+    # Latest non-canceled order of a guest, guest detail order history
+    op.create_index('ix_orders_guest_id_created_at', 'orders',
+                    ['guest_id', sa.text('created_at DESC')], unique=False)
+    # Backfill (same aggregate as backend.guest_stats.rebuild)
+    op.execute("""
+        UPDATE guests g SET
+            total_spent = COALESCE(agg.total_spent, 0),
+            last_order_at = agg.last_order_at,
+            cancel_count = COALESCE(agg.cancel_count, 0),
+            favorite_mix_id = (SELECT s.mix_id FROM guest_mix_stats s
+                               WHERE s.guest_id = g.id
+                               ORDER BY s.order_count DESC, s.last_ordered_at DESC
+                               LIMIT 1)
+        FROM guests g2
+        LEFT JOIN (
+            SELECT o.guest_id,
+                   SUM(t.total) FILTER (WHERE o.status != 'CANCELED') AS total_spent,
+                   MAX(o.created_at) FILTER (WHERE o.status != 'CANCELED') AS last_order_at,
+                   COUNT(*) FILTER (WHERE o.status = 'CANCELED') AS cancel_count
+            FROM orders o
+            CROSS JOIN LATERAL (
+                SELECT COALESCE(SUM(oi.total_price_gel), 0) AS total
+                FROM order_items oi WHERE oi.order_id = o.id
+            ) t
+            WHERE o.guest_id IS NOT NULL
+            GROUP BY o.guest_id
+        ) agg ON agg.guest_id = g2.id
+        WHERE g.id = g2.id
+    """)
+    # Keyset pagination of the admin guests list, one index per sort
+    op.create_index('ix_guests_created_at_id', 'guests',
+                    [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_guests_total_spent_id', 'guests',
+                    [sa.text('total_spent DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_guests_last_order_at_id', 'guests',
+                    [sa.text("COALESCE(last_order_at, '-infinity'::timestamptz) DESC"), sa.text('id DESC')],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_guests_last_order_at_id', table_name='guests')
+    op.drop_index('ix_guests_total_spent_id', table_name='guests')
+    op.drop_index('ix_guests_created_at_id', table_name='guests')
+    op.drop_index('ix_orders_guest_id_created_at', table_name='orders')
+    op.drop_constraint('guests_favorite_mix_id_fkey', 'guests', type_='foreignkey')
+    op.drop_column('guests', 'favorite_mix_id')
+    op.drop_column('guests', 'cancel_count')
+    op.drop_column('guests', 'last_order_at')
+    op.drop_column('guests', 'total_spent')
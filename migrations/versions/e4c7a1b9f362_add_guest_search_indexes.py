@@ -0,0 +1,83 @@
+"""add_guest_search_indexes
+
+Revision ID: e4c7a1b9f362
+Revises: d8b2f4a6c913
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'e4c7a1b9f362'
+down_revision: Union[str, None] = 'd8b2f4a6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same rules as backend.phones.normalize_phone (NULL: not a phone, left as is)
+NORMALIZE_PHONE_FN = r"""
+    CREATE FUNCTION pg_temp.normalize_phone(raw text) RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT CASE WHEN length(d) BETWEEN 7 AND 15 THEN '+' || d END
+        FROM (
+            SELECT CASE
+                WHEN length(d) = 9 THEN '995' || d
+                WHEN length(d) = 10 AND d LIKE '0%' THEN '995' || substr(d, 2)
+                ELSE d
+            END AS d
+            FROM (
+                SELECT regexp_replace(regexp_replace(raw, '\D', '', 'g'), '^00', '') AS d
+            ) digits
+        ) national
+    $$
+"""
+
+
+def _normalize(table, unique_with=None):
+    """Normalize table.phone. With `unique_with` (the other columns of a
+    unique key on phone, possibly none), rows whose canonical phone would
+    collide keep their current value."""
+    if unique_with is None:
+        op.execute(f"""
+            UPDATE {table}
+            SET phone = pg_temp.normalize_phone(phone)
+            WHERE pg_temp.normalize_phone(phone) != phone
+        """)
+        return
+    key = ", ".join(unique_with + ["COALESCE(pg_temp.normalize_phone(phone), phone)"])
+    op.execute(f"""
+        WITH n AS (
+            SELECT id, phone, pg_temp.normalize_phone(phone) AS norm,
+                   COUNT(*) OVER (PARTITION BY {key}) AS dupes
+            FROM {table}
+        )
+        UPDATE {table} t SET phone = n.norm
+        FROM n
+        WHERE t.id = n.id AND n.norm != n.phone AND n.dupes = 1
+    """)
+
+
+def upgrade() -> None:
+    op.execute(NORMALIZE_PHONE_FN)
+    # Duplicate guests after normalization are left for manual merging
+    _normalize('guests', [])
+    _normalize('orders')
+    _normalize('promo_code_usages', ['promo_code_id'])
+    # Unique among unused discounts only
+    _normalize('discounts', ["CASE WHEN is_used THEN id::text END"])
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Substring search on phone / name
+    op.create_index('ix_guests_phone_trgm', 'guests', ['phone'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'phone': 'gin_trgm_ops'})
+    op.create_index('ix_guests_name_trgm', 'guests', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    # Last-digits search: reverse(phone) LIKE '6543%'
+    op.create_index('ix_guests_phone_reversed', 'guests',
+                    [sa.text('reverse(phone) text_pattern_ops')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_guests_phone_reversed', table_name='guests')
+    op.drop_index('ix_guests_name_trgm', table_name='guests')
+    op.drop_index('ix_guests_phone_trgm', table_name='guests')
+    # pg_trgm and the normalized phones stay
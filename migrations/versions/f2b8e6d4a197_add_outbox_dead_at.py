@@ -0,0 +1,30 @@
+"""add_outbox_dead_at
+
+Revision ID: f2b8e6d4a197
+Revises: a5d3c8e2f714
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'f2b8e6d4a197'
+down_revision: Union[str, None] = 'a5d3c8e2f714'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox', sa.Column('dead_at', sa.DateTime(timezone=True), nullable=True))
+    # Rows the consumer already gave up on (MAX_ATTEMPTS = 5 in bot/services/outbox.py)
+    op.execute("""
+        UPDATE notification_outbox SET dead_at = available_at
+        WHERE processed_at IS NULL AND attempts >= 5
+    """)
+    op.create_index('ix_notification_outbox_dead', 'notification_outbox', ['dead_at'],
+                    unique=False, postgresql_where=sa.text('dead_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_dead', table_name='notification_outbox')
+    op.drop_column('notification_outbox', 'dead_at')
@@ -0,0 +1,51 @@
+import apiClient, { getTelegramUser } from './client';
+import type { Mix, Drink } from '../types';
+import type { AvailabilityResponse, OrdersResponse } from './orders';
+
+export interface BootstrapResponse {
+  user: { telegram_id: number; language: string };
+  mixes: Mix[];
+  featured: Mix | null;
+  drinks: Drink[];
+  availability: AvailabilityResponse;
+  orders: OrdersResponse;
+}
+
+let bootstrapPromise: Promise<BootstrapResponse | null> | null = null;
+const consumed = new Set<keyof BootstrapResponse>();
+
+// One request on launch instead of ensure + language + catalog + availability + orders
+export function loadBootstrap(): Promise<BootstrapResponse | null> {
+  if (!bootstrapPromise) {
+    const user = getTelegramUser();
+    bootstrapPromise = user.id > 0
+      ? apiClient
+          .get('/bootstrap', {
+            params: {
+              telegram_id: user.id,
+              username: user.username,
+              first_name: user.first_name,
+              last_name: user.last_name,
+            },
+          })
+          .then((res) => res.data as BootstrapResponse)
+          .catch(() => null)
+      : Promise.resolve(null);
+  }
+  return bootstrapPromise;
+}
+
+// Each part is served from the launch document once; later calls refetch
+export async function takeFromBootstrap<K extends keyof BootstrapResponse>(
+  key: K,
+): Promise<BootstrapResponse[K] | undefined> {
+  if (consumed.has(key)) return undefined;
+  consumed.add(key);
+  const data = await loadBootstrap();
+  return data ? data[key] : undefined;
+}
+
+// Drop parts that a user action has made stale (e.g. after placing an order)
+export function discardBootstrap(...keys: (keyof BootstrapResponse)[]): void {
+  keys.forEach((key) => consumed.add(key));
+}
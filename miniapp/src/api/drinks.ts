@@ -1,8 +1,11 @@
 import apiClient from './client';
 import { Drink } from '../types';
+import { takeFromBootstrap } from './bootstrap';
 
 export const drinksApi = {
   getAll: async (): Promise<Drink[]> => {
+    const boot = await takeFromBootstrap('drinks');
+    if (boot !== undefined) return boot;
     const response = await apiClient.get('/drinks');
     return response.data;
   },
@@ -1,9 +1,12 @@
 import apiClient from './client';
 import { Mix } from '../types';
+import { takeFromBootstrap } from './bootstrap';
 
 export const mixesApi = {
   // Получить все активные миксы
   getAll: async (): Promise<Mix[]> => {
+    const boot = await takeFromBootstrap('mixes');
+    if (boot !== undefined) return boot;
     const response = await apiClient.get('/mixes');
     return response.data;
   },
@@ -16,6 +19,8 @@ export const mixesApi = {
 
   // Получить featured микс (Mix of the Week)
   getFeatured: async (): Promise<Mix | null> => {
+    const boot = await takeFromBootstrap('featured');
+    if (boot !== undefined) return boot;
     const response = await apiClient.get('/mixes/featured');
     return response.data;
   },
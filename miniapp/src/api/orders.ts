@@ -1,4 +1,5 @@
 import api from './client';
+import { takeFromBootstrap, discardBootstrap } from './bootstrap';
 
 interface DrinkItem {
   drink_id: string;
@@ -42,6 +43,8 @@ export interface AvailabilityResponse {
 }
 
 export async function getAvailability(): Promise<AvailabilityResponse> {
+  const boot = await takeFromBootstrap('availability');
+  if (boot !== undefined) return boot;
   const { data } = await api.get('/availability');
   return data;
 }
@@ -80,18 +83,94 @@ export interface OrderData {
   total: number;
 }
 
-interface OrdersResponse {
+export interface OrdersResponse {
   active: OrderData | null;
   history: OrderData[];
+  next_cursor: string | null;
+}
+
+export interface RebowlInfo {
+  status: 'REQUESTED' | 'IN_PROGRESS';
+  mix_name: string;
+}
+
+export interface OrderStreamEvent {
+  active: OrderData | null;
+  rebowl: RebowlInfo | null;
+}
+
+const POLL_INTERVAL = 10_000;
+const STREAM_RETRY_AFTER = 30_000;
+
+/**
+ * Live updates of the active order (SSE). Returns an unsubscribe function.
+ * Without EventSource, or while the server refuses streams (503 when a
+ * backend process is at its stream cap), polls /orders/active instead and
+ * retries the stream every STREAM_RETRY_AFTER.
+ */
+export function subscribeOrders(telegramId: number, onEvent: (event: OrderStreamEvent) => void): () => void {
+  let source: EventSource | null = null;
+  let pollTimer: ReturnType<typeof setInterval> | null = null;
+  let retryTimer: ReturnType<typeof setTimeout> | null = null;
+  let closed = false;
+
+  const poll = () => {
+    api.get('/orders/active', { params: { telegram_id: telegramId } })
+      .then(({ data }) => { if (!closed) onEvent(data); })
+      .catch((err) => console.error('Failed to poll orders:', err));
+  };
+
+  const startPolling = () => {
+    if (pollTimer) return;
+    poll();
+    pollTimer = setInterval(poll, POLL_INTERVAL);
+  };
+
+  const stopPolling = () => {
+    if (pollTimer) clearInterval(pollTimer);
+    pollTimer = null;
+  };
+
+  const connect = () => {
+    retryTimer = null;
+    if (closed) return;
+    source = new EventSource(`${api.defaults.baseURL}/orders/stream?telegram_id=${telegramId}`);
+    source.addEventListener('order', (e) => {
+      stopPolling();
+      onEvent(JSON.parse((e as MessageEvent).data));
+    });
+    source.onerror = () => {
+      // CONNECTING: the browser reconnects by itself. CLOSED: refused (503) for good
+      if (source?.readyState !== EventSource.CLOSED) return;
+      source = null;
+      startPolling();
+      retryTimer = setTimeout(connect, STREAM_RETRY_AFTER);
+    };
+  };
+
+  if (typeof EventSource === 'undefined') startPolling();
+  else connect();
+
+  return () => {
+    closed = true;
+    source?.close();
+    stopPolling();
+    if (retryTimer) clearTimeout(retryTimer);
+  };
 }
 
 export async function createOrder(payload: CreateOrderPayload): Promise<CreateOrderResponse> {
+  discardBootstrap('orders', 'availability');
   const { data } = await api.post('/orders', payload);
   return data;
 }
 
-export async function getOrders(telegramId: number): Promise<OrdersResponse> {
-  const { data } = await api.get('/orders', { params: { telegram_id: telegramId } });
+export async function getOrders(telegramId: number, cursor?: string): Promise<OrdersResponse> {
+  if (!cursor) {
+    const boot = await takeFromBootstrap('orders');
+    if (boot !== undefined) return boot;
+  }
+  const { data } = await api.get('/orders', { params: { telegram_id: telegramId, cursor } });
   return data;
 }
 
@@ -2,6 +2,7 @@ import { createContext, useContext, useState, useEffect, useRef, ReactNode } fro
 import { Language } from '../types';
 import { getTelegramId, getTelegramUser } from '../api/client';
 import { getUserLanguage, setUserLanguage, ensureUser } from '../api/user';
+import { loadBootstrap } from '../api/bootstrap';
 
 interface LanguageContextType {
   language: Language;
@@ -26,25 +27,34 @@ export function LanguageProvider({ children }: { children: ReactNode }) {
     const telegramId = getTelegramId();
     if (telegramId <= 0) return;
 
-    // Ensure user record exists (fire-and-forget)
-    const tgUser = getTelegramUser();
-    ensureUser({
-      telegram_id: tgUser.id,
-      username: tgUser.username,
-      first_name: tgUser.first_name,
-      last_name: tgUser.last_name,
-    }).catch(() => {});
+    const applyServerLanguage = (serverLang: string) => {
+      const lang = serverLang === 'en' ? 'en' : 'ru';
+      if (lang !== language) {
+        setLanguageState(lang);
+        localStorage.setItem('gg_language', lang);
+      }
+    };
 
-    // Load language from server
-    getUserLanguage(telegramId)
-      .then((serverLang) => {
-        const lang = serverLang === 'en' ? 'en' : 'ru';
-        if (lang !== language) {
-          setLanguageState(lang);
-          localStorage.setItem('gg_language', lang);
-        }
-      })
-      .catch(() => {});
+    // Bootstrap upserts the user and returns the saved language
+    loadBootstrap().then((boot) => {
+      if (boot) {
+        applyServerLanguage(boot.user.language);
+        return;
+      }
+
+      // Fallback: separate ensure + language calls
+      const tgUser = getTelegramUser();
+      ensureUser({
+        telegram_id: tgUser.id,
+        username: tgUser.username,
+        first_name: tgUser.first_name,
+        last_name: tgUser.last_name,
+      }).catch(() => {});
+
+      getUserLanguage(telegramId)
+        .then(applyServerLanguage)
+        .catch(() => {});
+    });
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
@@ -1,8 +1,8 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import { useLanguageContext } from '../contexts/LanguageContext';
 import { t } from '../utils/translations';
-import { getOrders, cancelOrder, readyForPickup, OrderData } from '../api/orders';
+import { getOrders, cancelOrder, readyForPickup, subscribeOrders, OrderData, RebowlInfo } from '../api/orders';
 import { getTelegramId } from '../api/client';
 
 function SessionTimer({ endsAt }: { endsAt: string }) {
@@ -66,7 +66,10 @@ export default function Orders() {
   const { language } = useLanguageContext();
 
   const [active, setActive] = useState<OrderData | null>(null);
+  const [rebowl, setRebowl] = useState<RebowlInfo | null>(null);
   const [history, setHistory] = useState<OrderData[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [showSuccess, setShowSuccess] = useState(locationState?.justCreated || false);
   const [confirmCancel, setConfirmCancel] = useState(false);
@@ -75,18 +78,58 @@ export default function Orders() {
 
   const telegramId = getTelegramId();
 
+  // Older pages loaded with "Show more": a refresh must not drop them
+  const morePagesRef = useRef(0);
+
   const fetchOrders = useCallback(() => {
     getOrders(telegramId)
       .then((data) => {
         setActive(data.active);
-        setHistory(data.history);
+        if (morePagesRef.current === 0) {
+          setHistory(data.history);
+          setNextCursor(data.next_cursor);
+          return;
+        }
+        // Fresh first page on top of the loaded pages; keep paging where it was
+        setHistory((prev) => {
+          const fresh = new Set(data.history.map((o) => o.id));
+          return [...data.history, ...prev.filter((o) => !fresh.has(o.id))];
+        });
       })
       .catch((err) => console.error('Failed to fetch orders:', err))
       .finally(() => setLoading(false));
   }, [telegramId]);
 
+  const loadMoreHistory = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    getOrders(telegramId, nextCursor)
+      .then((data) => {
+        morePagesRef.current += 1;
+        setHistory((prev) => [...prev, ...data.history]);
+        setNextCursor(data.next_cursor);
+      })
+      .catch((err) => console.error('Failed to fetch orders:', err))
+      .finally(() => setLoadingMore(false));
+  };
+
   useEffect(() => { fetchOrders(); }, [fetchOrders]);
 
+  // Live status / timer / rebowl updates pushed by the backend (SSE)
+  const activeIdRef = useRef<string | null>(null);
+  useEffect(() => { activeIdRef.current = active?.id ?? null; }, [active]);
+
+  useEffect(() => {
+    if (!telegramId) return;
+    return subscribeOrders(telegramId, (event) => {
+      const prevId = activeIdRef.current;
+      setActive(event.active);
+      setRebowl(event.rebowl);
+      // Active order finished: it moved to history
+      if (prevId && prevId !== event.active?.id) fetchOrders();
+    });
+  }, [telegramId, fetchOrders]);
+
   useEffect(() => {
     if (showSuccess) {
       const timer = setTimeout(() => setShowSuccess(false), 5000);
@@ -302,6 +345,12 @@ export default function Orders() {
                   ? t('checkout_deposit_cash', language)
                   : t('checkout_deposit_passport', language)}
               </span>
+              {rebowl && (
+                <span style={{ color: 'var(--green-dark)', fontWeight: 700 }}>
+                  🔄 {t(rebowl.status === 'IN_PROGRESS' ? 'orders_rebowl_in_progress' : 'orders_rebowl_requested', language)}
+                  {' — '}{rebowl.mix_name}
+                </span>
+              )}
             </div>
 
             {/* Timer */}
@@ -546,6 +595,27 @@ export default function Orders() {
               </div>
             );
           })}
+          {nextCursor && (
+            <button
+              onClick={loadMoreHistory}
+              disabled={loadingMore}
+              style={{
+                width: '100%',
+                padding: '10px 14px',
+                background: 'transparent',
+                border: '1.5px solid var(--border)',
+                color: 'var(--text-secondary)',
+                borderRadius: 'var(--radius-sm)',
+                fontFamily: "'Nunito', sans-serif",
+                fontSize: 13,
+                fontWeight: 800,
+                cursor: 'pointer',
+                opacity: loadingMore ? 0.6 : 1,
+              }}
+            >
+              {loadingMore ? '⏳' : t('orders_load_more', language)}
+            </button>
+          )}
         </>
       )}
 
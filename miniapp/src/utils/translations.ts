@@ -76,6 +76,9 @@ type TranslationKeys = {
   orders_active: string;
   orders_history: string;
   orders_order_again: string;
+  orders_load_more: string;
+  orders_rebowl_requested: string;
+  orders_rebowl_in_progress: string;
   orders_session_end: string;
   orders_time_left: string;
 
@@ -179,6 +182,9 @@ const translations: Record<Language, TranslationKeys> = {
     orders_active: 'Активный заказ',
     orders_history: 'История',
     orders_order_again: 'Повторить',
+    orders_load_more: 'Показать ещё',
+    orders_rebowl_requested: 'Перезабивка запрошена',
+    orders_rebowl_in_progress: 'Перезабивка в пути',
     orders_session_end: 'До окончания сессии',
     orders_time_left: 'Осталось более 30 мин',
 
@@ -277,6 +283,9 @@ const translations: Record<Language, TranslationKeys> = {
     orders_active: 'Active order',
     orders_history: 'History',
     orders_order_again: 'Reorder',
+    orders_load_more: 'Show more',
+    orders_rebowl_requested: 'Rebowl requested',
+    orders_rebowl_in_progress: 'Rebowl on the way',
     orders_session_end: 'Session ends in',
     orders_time_left: 'More than 30 min left',
 
@@ -0,0 +1,78 @@
+"""CallbackAckMiddleware: early answers, alerts for fast failures, double taps."""
+
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from bot.middlewares.callback_ack import ACK_DELAY, CallbackAckMiddleware, reply_error  # noqa: E402
+
+_ids = itertools.count()
+
+
+class FakeMessage:
+    def __init__(self):
+        self.sent = []
+
+    async def answer(self, text, **kwargs):
+        self.sent.append(text)
+
+
+class FakeCallback:
+    def __init__(self, user_id=1, data="action:cancel"):
+        self.id = str(next(_ids))
+        self.from_user = SimpleNamespace(id=user_id)
+        self.data = data
+        self.message = FakeMessage()
+        self.answers = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append((text, show_alert))
+
+
+def _run(handler, *callbacks):
+    middleware = CallbackAckMiddleware()
+
+    async def scenario():
+        for cb in callbacks:
+            await middleware(handler, cb, {})
+
+    asyncio.run(scenario())
+
+
+def test_fast_failure_is_an_alert():
+    async def handler(cb, data):
+        await reply_error(cb, "No active order.")
+
+    cb = FakeCallback()
+    _run(handler, cb)
+    assert cb.answers == [("No active order.", True)]
+    assert cb.message.sent == []
+
+
+def test_slow_handler_is_acked_early_and_fails_in_chat():
+    async def handler(cb, data):
+        await asyncio.sleep(ACK_DELAY * 2)
+        assert cb.answers == [(None, False)]  # spinner stopped before the work ended
+        await reply_error(cb, "Could not update order status.")
+
+    cb = FakeCallback()
+    _run(handler, cb)
+    assert cb.answers == [(None, False)]
+    assert cb.message.sent == ["Could not update order status."]
+
+
+def test_double_tap_is_dropped_but_answered():
+    calls = []
+
+    async def handler(cb, data):
+        calls.append(cb.id)
+
+    first, second = FakeCallback(), FakeCallback()
+    _run(handler, first, second)
+    assert calls == [first.id]
+    assert first.answers == [(None, False)]
+    assert second.answers == [(None, False)]
@@ -0,0 +1,98 @@
+"""create_order runs a fixed number of statements, whatever the cart size."""
+
+import uuid
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")
+pytest.importorskip("pytz")
+
+import backend.app as backend_app  # noqa: E402
+
+# SELECTs that must find nothing for a first-time guest's order
+EMPTY_LOOKUPS = (
+    "FROM orders WHERE telegram_id",
+    "FROM guests WHERE phone",
+    "FROM discounts",
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.rowcount = len(rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConn:
+    """Answers create_order's queries without a database and counts them."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "FROM mixes" in sql:
+            return FakeResult([(mid, "Mix") for mid in params["ids"]])
+        if "FROM menu_items" in sql:
+            return FakeResult([(did, "Drink", 5) for did in params["ids"]])
+        if any(lookup in sql for lookup in EMPTY_LOOKUPS):
+            return FakeResult([])
+        # Rented count, reservation, RETURNING id, ...
+        return FakeResult([(0,)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeEngine:
+    def __init__(self):
+        self.conns = []
+
+    def begin(self):
+        conn = FakeConn()
+        self.conns.append(conn)
+        return conn
+
+
+class FakeSettings:
+    def snapshot(self):
+        return {"total_hookahs": 10, "max_hookahs_regular": 3}
+
+
+def _count_statements(monkeypatch, hookahs, drinks):
+    engine = FakeEngine()
+    monkeypatch.setattr(backend_app, "engine", engine)
+    monkeypatch.setattr(backend_app, "settings", FakeSettings())
+    payload = {
+        "telegram_id": 42,
+        "phone": "555 12-34-56",
+        "address_text": "Rustaveli 1",
+        "items": [{"mix_id": str(uuid.uuid4()), "quantity": 1} for _ in range(hookahs)],
+        "drinks": [{"drink_id": str(uuid.uuid4()), "qty": 1} for _ in range(drinks)],
+    }
+    resp = backend_app.app.test_client().post("/api/orders", json=payload)
+    assert resp.status_code == 201, resp.get_json()
+    (conn,) = engine.conns
+    return len(conn.statements)
+
+
+def test_statement_count_does_not_grow_with_cart(monkeypatch):
+    single = _count_statements(monkeypatch, hookahs=1, drinks=0)
+    with_drink = _count_statements(monkeypatch, hookahs=1, drinks=1)
+    full = _count_statements(monkeypatch, hookahs=3, drinks=8)
+    assert full == with_drink
+    # A cart without drinks only skips the (empty) drinks lookup
+    assert full == single + 1
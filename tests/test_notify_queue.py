@@ -0,0 +1,46 @@
+"""NotifyQueue: card events waiting out the debounce must not pace the queue."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("aiogram")
+pytest.importorskip("asyncpg")
+pytest.importorskip("dotenv")
+
+# bot.db builds its engine at import; nothing connects in this test
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://gg_hookah@localhost/gg_hookah")
+
+from bot import notification_server  # noqa: E402
+from bot.notification_server import NotifyQueue  # noqa: E402
+
+DEBOUNCE = 0.5
+
+
+def test_debounced_events_are_delivered_concurrently(monkeypatch):
+    async def slow_card_update(bot, event, telegram_id, data, order_id=None):
+        await asyncio.sleep(DEBOUNCE)
+        return True
+
+    monkeypatch.setattr(notification_server, "send_notification", slow_card_update)
+
+    async def scenario():
+        queue = NotifyQueue(bot=None)
+        await queue.start(None)
+        try:
+            events = [("ORDER_CONFIRMED", i, {"order_id": f"order-{i}"}) for i in range(50)]
+            started = time.monotonic()
+            assert queue.put_many(events)
+            await asyncio.wait_for(queue._queue.join(), 5.0)
+            elapsed = time.monotonic() - started
+        finally:
+            await queue.stop(None)
+        return queue.stats(), elapsed
+
+    stats, elapsed = asyncio.run(scenario())
+    assert elapsed < DEBOUNCE * 3
+    assert stats["sent"] == 50
+    assert stats["in_flight"] == 0
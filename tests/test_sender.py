@@ -0,0 +1,69 @@
+"""OutboundSender scheduling: a busy chat must not hold up other chats."""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from bot.services.sender import WORKERS, OutboundSender, Priority  # noqa: E402
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, time.monotonic()))
+        return (chat_id, text)
+
+    async def edit_message_text(self, text, chat_id, **kwargs):
+        self.sent.append((chat_id, text, time.monotonic()))
+        return True
+
+
+def test_burst_to_one_chat_does_not_delay_another():
+    async def scenario():
+        bot = FakeBot()
+        sender = OutboundSender()
+        sender.start(bot)
+        try:
+            # More messages than workers, all to one chat (1 msg/s)
+            burst = [sender.send_nowait(1, f"alert {i}", Priority.ADMIN)
+                     for i in range(WORKERS * 2)]
+            started = time.monotonic()
+            message = await asyncio.wait_for(sender.send(2, "status", Priority.CLIENT), 1.0)
+            elapsed = time.monotonic() - started
+        finally:
+            await sender.stop()
+        return bot, burst, message, elapsed
+
+    bot, burst, message, elapsed = asyncio.run(scenario())
+
+    assert message == (2, "status")
+    assert elapsed < 0.5
+    # The burst is still being paced at 1 msg/s when chat 2 gets its message
+    assert sum(1 for chat_id, _, _ in bot.sent if chat_id == 1) < len(burst)
+    assert all(f.done() for f in burst)
+
+
+def test_chat_order_is_kept():
+    async def scenario():
+        bot = FakeBot()
+        sender = OutboundSender()
+        sender.start(bot)
+        try:
+            futures = [sender.send_nowait(7, f"m{i}") for i in range(3)]
+            await asyncio.wait_for(asyncio.gather(*futures), 5.0)
+        finally:
+            await sender.stop()
+        return bot
+
+    bot = asyncio.run(scenario())
+
+    texts = [text for chat_id, text, _ in bot.sent if chat_id == 7]
+    assert texts == ["m0", "m1", "m2"]
+    times = [ts for chat_id, _, ts in bot.sent if chat_id == 7]
+    # Per-chat pacing: ~1 msg/s after the first
+    assert times[2] - times[0] >= 1.5
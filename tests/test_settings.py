@@ -0,0 +1,28 @@
+"""Settings snapshot: invalid values fall back to the caller's default."""
+
+from datetime import time as dtime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from backend.settings import build_snapshot, parse_value  # noqa: E402
+
+
+def test_parse_value_types():
+    assert parse_value("pause_orders", "True") is True
+    assert parse_value("late_order_cutoff_time", "01:30") == dtime(1, 30)
+    assert parse_value("base_bowl_price", "70") == 70
+    assert parse_value("support_text", "hi") == "hi"
+
+
+def test_invalid_values_use_defaults():
+    snap = build_snapshot([
+        ("base_bowl_price", "seventy"),
+        ("late_order_cutoff_time", "late"),
+        ("free_extension", "45"),
+    ], version=1)
+    assert parse_value("base_bowl_price", "seventy") is None
+    assert snap.get("base_bowl_price", 70) == 70
+    assert snap.get("late_order_cutoff_time", dtime(1, 30)) == dtime(1, 30)
+    assert snap.get("free_extension", 60) == 45